@@ -1,14 +1,20 @@
+import logging
 import streamlit as st
-import pandas as pd
 from supabase import create_client, Client
 from streamlit_mic_recorder import mic_recorder
 from groq import Groq
 import os
-import re
 import datetime
 import json
 import PyPDF2
 import random
+from core.context import pack_context
+from core.catalog import session_footprint
+from core.transcription import transcribe_stream
+from core.grading import grade_answer_stream, format_feedback
+from views.auth_view import load_stylesheet, restore_session, logout, auth_enabled, show_login_page
+from views.resources import (get_question_index, get_tagger, get_prefetcher, get_analytics, open_question,
+                             current_user_id, submission_user_id, get_catalog, fetch_score_history)
 
 # --- 1. CONFIG & SETUP ---
 st.set_page_config(page_title="Bleet", layout="wide", page_icon="🐑")
@@ -21,14 +27,18 @@ def init_clients():
     return supabase, groq
 
 supabase, groq_client = init_clients()
+logger = logging.getLogger(__name__)
 
 # --- website design call ---
 def load_css():
-    with open("assets/style.css") as f:
-        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+    st.markdown(f"<style>{load_stylesheet()}</style>", unsafe_allow_html=True)
 
 load_css() 
 
+# Picks up a stored login if there is one; the app still works signed out
+# (and sign-in is simply hidden when SESSION_SECRET isn't configured)
+restore_session()
+
 # Session State
 if "selected_question" not in st.session_state:
     st.session_state.selected_question = None
@@ -49,15 +59,17 @@ def generate_custom_questions(resume_text, jd_text):
     Uses Llama 3 to generate 7 HIGH-LEVEL BEHAVIORAL questions.
     Critically tuned to avoid technical "how-to" questions while still referencing resume context.
     """
+    # Only send the resume / JD sections that actually overlap, within a token budget
+    resume_context, jd_context = pack_context(resume_text, jd_text)
     prompt = f"""
     You are a Bar Raiser at a top tech company (Amazon/Google style). 
     I will provide a Candidate's Resume and a Job Description.
 
     ### CANDIDATE RESUME
-    {resume_text[:2500]}
+    {resume_context}
 
     ### JOB DESCRIPTION
-    {jd_text[:2500]}
+    {jd_context}
 
     ### YOUR GOAL
     Generate 7 DEEP BEHAVIORAL interview questions.
@@ -116,32 +128,21 @@ def generate_custom_questions(resume_text, jd_text):
         return []
 
 def get_ai_feedback(user_transcript, ideal_answer, question_text):
-    prompt = f"""
-    Role: Senior Recruiter.
-    Question: "{question_text}"
-    Candidate Answer: "{user_transcript}"
-    
-    Task: Grade based on Relevance, STAR Structure, and Clarity.
-    (Ref Answer Strategy: "{ideal_answer}")
-    
-    OUTPUT FORMAT:
-    Score: [0-100]
-    Verdict: [Strong Hire / Hire / Weak Hire / No Hire]
-    Feedback: [Specific advice]
     """
-    completion = groq_client.chat.completions.create(
-        model="llama-3.3-70b-versatile", messages=[{"role": "user", "content": prompt}]
-    )
-    return completion.choices[0].message.content
-
-def parse_feedback(feedback_text):
-    score = 0
-    verdict = "Pending"
-    score_match = re.search(r"Score:\s*(\d+)", feedback_text, re.IGNORECASE)
-    if score_match: score = int(score_match.group(1))
-    verdict_match = re.search(r"Verdict:\s*(.+)", feedback_text, re.IGNORECASE)
-    if verdict_match: verdict = verdict_match.group(1).strip()
-    return score, verdict, feedback_text
+    Streams the grade into the page: score and verdict show up as soon as the
+    model emits them, feedback renders token by token. Returns the final grade.
+    """
+    c1, c2 = st.columns(2)
+    score_slot, verdict_slot = c1.empty(), c2.empty()
+    feedback_slot = st.empty()
+
+    result = None
+    for state in grade_answer_stream(user_transcript, ideal_answer, question_text, groq_client):
+        score_slot.metric("Score", state["score"] if state["score"] is not None else "...")
+        verdict_slot.metric("Verdict", state["verdict"] or "...")
+        feedback_slot.write(state["feedback"])
+        result = state
+    return result
 
 # --- 3. UI VIEWS ---
 
@@ -166,13 +167,19 @@ def view_custom_generator():
             
             if generated_batch and len(generated_batch) > 0:
                 # Tag as User Generated
-                for q in generated_batch:
+                tags = get_tagger().tag([q.get('question', '') for q in generated_batch])
+                for q, t in zip(generated_batch, tags):
                     q['source_type'] = "User Generated"
+                    # The LLM's labels win; the local tagger only fills what it left out
+                    q['category'] = q.get('category') or t['category']
                 
                 try:
                     # Save ALL generated questions to DB so they can be practiced
                     data, count = supabase.table("custom_questions").insert(generated_batch).execute()
-                    st.session_state.generated_questions = generated_batch
+                    # Keep only what the list below renders; the full row is looked up on Practice
+                    st.session_state.generated_questions = [
+                        {k: q.get(k) for k in ("question", "category", "difficulty")} for q in generated_batch
+                    ]
                     st.success(f"🎉 Success! Generated and saved {len(generated_batch)} behavioral scenarios.")
                 except Exception as db_err:
                     st.error(f"Database Error: {db_err}")
@@ -187,11 +194,12 @@ def view_custom_generator():
         for i, q in enumerate(st.session_state.generated_questions):
             with st.container():
                 st.markdown(f"**Question {i+1}:** {q['question']}")
-                st.caption(f"Category: {q['category']} | Difficulty: {q['difficulty']}")
+                st.caption(f"Category: {q['category']} | Difficulty: {q['difficulty'] or 'Unrated'}")
                 if st.button(f"Practice Question {i+1} ➡️", key=f"btn_{i}"):
                     # Fetch ID for submission tracking
                     db_row = supabase.table("questions").select("*").eq("question", q['question']).limit(1).single().execute()
-                    st.session_state.selected_question = db_row.data
+                    # Session holds a reference to the shared, read-only row
+                    st.session_state.selected_question = get_prefetcher(supabase).put([db_row.data])[0]
                     st.rerun()
                 st.divider()
 
@@ -199,38 +207,47 @@ def view_custom_generator():
 def view_problem_list():
     st.title("Think Clear, Be You")
     
-    # Fetch Data
-    @st.cache_data(ttl=5) 
-    def fetch_questions():
-        response = supabase.table("questions").select("id, question, company, role, difficulty, category").order("created_at", desc=True).limit(500).execute()
-        return pd.DataFrame(response.data)
-
-    df = fetch_questions()
+    # Fetch Data (served from the last snapshot, refreshed in the background)
+    prefetcher = get_prefetcher(supabase)
+    index = get_question_index(supabase)
+    catalog = get_catalog(supabase)
     
-    if df.empty:
+    if catalog.empty:
         st.warning("Database empty.")
         return
 
+    # Recommendations (in-process, weighted toward weak categories)
+    picks = index.recommend(fetch_score_history(supabase, current_user_id()), k=3)
+    if picks:
+        st.subheader("🎯 Recommended Next")
+        for qid, _ in picks:
+            c1, c2 = st.columns([5, 1], vertical_alignment="center")
+            c1.markdown(f"**{index.question(qid)}** <span class=\"badge-base badge-blue\">{index.category(qid)}</span>", unsafe_allow_html=True)
+            if c2.button("Start", key=f"rec_{qid}") and open_question(supabase, qid):
+                st.rerun()
+        st.divider()
+
     # Filters
     with st.sidebar:
         st.header("🔍 Filter Library")
         # Filter Logic (Handles None values)
-        companies = ["All"] + sorted([str(x) for x in df['company'].unique() if x is not None])
-        roles = ["All"] + sorted([str(x) for x in df['role'].unique() if x is not None])
+        companies = ["All"] + catalog.options("company")
+        roles = ["All"] + catalog.options("role")
         
         company = st.selectbox("Company", companies)
         role = st.selectbox("Role", roles)
 
-    # Apply Filters
-    if company != "All": df = df[df['company'] == company]
-    if role != "All": df = df[df['role'] == role]
+    # Apply Filters (cached on the catalog, shared by sessions with the same filters)
+    positions = catalog.view(company=company, role=role)
+
+    # Warm full rows for what the user is most likely to click next
+    prefetcher.warm([qid for qid, _ in picks] + catalog.ids[positions[:20]].tolist())
 
-    # Table
-    
     st.markdown("<br>", unsafe_allow_html=True)
 
     # 3. Render Cards with Centered Buttons
-    for index, row in df.iterrows():
+    for pos in positions:
+        row = catalog.row(pos)
         # Handle defaults
         diff = row.get('difficulty', 'Medium') or 'Medium'
         role = row.get('role', 'General') or 'General'
@@ -261,11 +278,9 @@ def view_problem_list():
         with c2:
             # The Button (Updated Logic)
             if st.button("Start", key=f"btn_{row['id']}"):
-                # Force fetch the full question (including ideal_answer) from DB
-                # Note: We cast row['id'] to int just to be safe, but the query handles it.
-                full_q = supabase.table("questions").select("*").eq("id", row['id']).single().execute()
-                st.session_state.selected_question = full_q.data
-                st.rerun()
+                # Full question (including ideal_answer), usually already prefetched
+                if open_question(supabase, row['id']):
+                    st.rerun()
         
         # Add a subtle separator
         st.markdown("<hr style='margin: 8px 0; border-color: #334155; opacity: 0.3;'>", unsafe_allow_html=True)
@@ -273,6 +288,13 @@ def view_problem_list():
 
 def view_solve_page():
     q = st.session_state.selected_question
+
+    # While the user reads and records: warm Groq and the likely next questions
+    prefetcher = get_prefetcher(supabase)
+    prefetcher.warm_connection(groq_client)
+    index = get_question_index(supabase)
+    next_ids = [qid for qid, _ in index.similar(q['id'], k=3)] + [qid for qid, _ in index.recommend(fetch_score_history(supabase, current_user_id()), k=3)]
+    prefetcher.warm(next_ids)
     
     # Header
     c1, c2 = st.columns([1, 6])
@@ -291,7 +313,7 @@ def view_solve_page():
             
     with right:
         st.write("🎙️ **Record Answer**")
-        audio = mic_recorder(start_prompt="🔴 Record", stop_prompt="⏹️ Stop", key='recorder')
+        audio = mic_recorder(start_prompt="🔴 Record", stop_prompt="⏹️ Stop", format="wav", key='recorder')
         
         if audio:
             st.audio(audio['bytes'])
@@ -299,30 +321,34 @@ def view_solve_page():
                 with st.spinner("Grading..."):
                     try:
                         # 1. Transcribe
-                        with open("temp.wav", "wb") as f: f.write(audio['bytes'])
-                        with open("temp.wav", "rb") as f:
-                            transcript = groq_client.audio.transcriptions.create(file=("temp.wav", f.read()), model="whisper-large-v3").text
+                        # Chunks are transcribed in parallel; show the transcript as it fills in
+                        transcript_slot = st.empty()
+                        for done, total, transcript in transcribe_stream(audio['bytes'], groq_client):
+                            transcript_slot.caption(f"Transcribing ({done}/{total}): {transcript}")
+                        transcript_slot.empty()
                         
                         # 2. Grade
-                        raw_feedback = get_ai_feedback(transcript, q['ideal_answer'], q['question'])
-                        score, verdict, feedback = parse_feedback(raw_feedback)
+                        result = get_ai_feedback(transcript, q['ideal_answer'], q['question'])
                         
                         # 3. Save
                         path = f"{q['id']}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.wav"
                         supabase.storage.from_("submissions").upload(path, audio['bytes'], {"content-type": "audio/wav"})
                         url = supabase.storage.from_("submissions").get_public_url(path)
                         
-                        supabase.table("submissions").insert({
+                        submission = {
                             "question_id": q['id'], "transcript": transcript, 
-                            "ai_score": score, "ai_feedback": raw_feedback, 
-                            "ai_verdict": verdict, "audio_url": url
-                        }).execute()
-                        
+                            "ai_score": result['score'], "ai_feedback": format_feedback(result), 
+                            "ai_verdict": result['verdict'], "audio_url": url,
+                            "user_id": submission_user_id()
+                        }
+                        supabase.table("submissions").insert(submission).execute()
                         st.success("Saved!")
-                        c1, c2 = st.columns(2)
-                        c1.metric("Score", score)
-                        c2.metric("Verdict", verdict)
-                        st.write(raw_feedback)
+                        # Keep the per-user / category / company / day aggregates current.
+                        # The answer is already saved, so a failure here must not look like a lost submission.
+                        try:
+                            get_analytics(supabase).record(submission, q, current_user_id())
+                        except Exception:
+                            logger.exception("Analytics update failed for question %s", q['id'])
                     except Exception as e:
                         st.error(f"Error processing submission: {e}")
 
@@ -344,9 +370,25 @@ with st.sidebar:
         ["Library Practice", "Custom Generator"], 
         on_change=reset_question_state
     )
-    st.divider()
+    auth_session = st.session_state.get("auth_session")
+    if auth_session:
+        st.caption(f"Signed in as {auth_session['email'] or auth_session['user_id']}")
+        st.button("Log out", on_click=logout, use_container_width=True)
+    elif auth_enabled():
+        if st.button("Sign in", use_container_width=True):
+            st.session_state.show_login = True
+            st.rerun()
+    if st.secrets.get("DEBUG"):
+        # Operator metric: per-session memory, not counting rows shared through the prefetch cache
+        shared_rows = list(get_prefetcher(supabase).rows.values())
+        footprint = session_footprint(st.session_state, shared_rows) / 1024
+        logger.info("Session memory: %.1f KB", footprint)
+        st.divider()
+        st.caption(f"Session memory: {footprint:.1f} KB")
 
-if st.session_state.selected_question:
+if st.session_state.get("show_login") and not auth_session:
+    show_login_page()
+elif st.session_state.selected_question:
     view_solve_page()
 elif mode == "Custom Generator":
     view_custom_generator()
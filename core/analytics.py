@@ -0,0 +1,207 @@
+import datetime
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+# --- CONFIGURATION ---
+STATS_TABLE = "submission_stats"
+ANONYMOUS = "anonymous"          # Owner stored on submissions made while signed out
+SESSION_PREFIX = "session-"      # Signed-out visitors' progress: per browser session, never persisted
+PAGE_SIZE = 1000
+STATS_TTL = 60                   # Seconds before a user's slices are re-read (other processes, backfills)
+BUMP_FUNCTION = "bump_submission_stats"
+
+# Aggregates live in one small Supabase table, one row per (user, dimension,
+# value), keyed "user|dimension|value". Submissions carry a user_id so a
+# backfill rebuilds the same slices. Schema: migrations/001_submission_stats.sql;
+# live increments happen in the database: migrations/002_bump_submission_stats.sql
+
+
+class ScoreStats:
+    """
+    Running aggregate for one slice of submissions. Scores are integers
+    0-100, so a 101-bin histogram is an exact percentile sketch that
+    never grows.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.hist = [0] * 101
+        self.verdicts = Counter()
+
+    @staticmethod
+    def normalize(score, verdict):
+        return min(100, max(0, int(score or 0))), verdict or "Pending"
+
+    def add(self, score, verdict):
+        score, verdict = self.normalize(score, verdict)
+        self.count += 1
+        self.total += score
+        self.hist[score] += 1
+        self.verdicts[verdict] += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p):
+        if not self.count:
+            return 0
+        target, seen = p / 100 * self.count, 0
+        for score, n in enumerate(self.hist):
+            seen += n
+            if seen >= target and n:
+                return score
+        return 100
+
+    def to_dict(self):
+        # Histogram stored sparse; most bins are empty
+        return {"count": self.count, "total": self.total,
+                "hist": {str(s): n for s, n in enumerate(self.hist) if n},
+                "verdicts": dict(self.verdicts)}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count = data.get("count", 0)
+        stats.total = data.get("total", 0)
+        for score, n in (data.get("hist") or {}).items():
+            stats.hist[int(score)] = n
+        stats.verdicts = Counter(data.get("verdicts") or {})
+        return stats
+
+
+def slice_keys(user_id, question, day):
+    """Every aggregate a single submission contributes to."""
+    return [
+        (user_id, "all", "all"),
+        (user_id, "category", question.get("category") or "Behavioral"),
+        (user_id, "company", question.get("company") or "Unknown"),
+        (user_id, "day", day),
+    ]
+
+
+def session_user_id():
+    """A fresh id for one signed-out browser session."""
+    return f"{SESSION_PREFIX}{uuid.uuid4().hex[:12]}"
+
+
+def is_session_user(user_id):
+    return str(user_id).startswith(SESSION_PREFIX)
+
+
+def encode_key(key):
+    return "|".join(str(part) for part in key)
+
+
+class SubmissionAnalytics:
+    """
+    Materialized per-user aggregates. record() increments the handful of
+    affected slices in the database (never overwrites them), and reads are
+    dict lookups over a copy re-read every STATS_TTL seconds.
+    """
+
+    def __init__(self, supabase=None, load_existing=True):
+        self.supabase = supabase
+        self.load_existing = load_existing
+        self.stats = {}
+        self.loaded_users = {}   # user_id -> time its slices were read
+        self.lock = threading.Lock()
+
+    # --- WRITES ---
+    def record(self, submission, question, user_id=ANONYMOUS, day=None, persist=True):
+        """Folds one graded submission into its slices."""
+        self.load_user(user_id)
+        day = day or datetime.date.today().isoformat()
+        keys = slice_keys(user_id, question, day)
+        with self.lock:
+            for key in keys:
+                self.stats.setdefault(key, ScoreStats()).add(submission.get("ai_score"), submission.get("ai_verdict"))
+        if persist and self.supabase is not None and not is_session_user(user_id):
+            score, verdict = ScoreStats.normalize(submission.get("ai_score"), submission.get("ai_verdict"))
+            self.supabase.rpc(BUMP_FUNCTION, {"p_user_id": user_id, "p_keys": [encode_key(k) for k in keys],
+                                              "p_score": score, "p_verdict": verdict}).execute()
+            with self.lock:
+                self.loaded_users.pop(user_id, None)  # Next read picks up the database's totals
+        return keys
+
+    def save(self, keys):
+        """Overwrites whole slices. Only for rebuilds (backfill); live updates go through record()."""
+        if self.supabase is None:
+            return
+        with self.lock:
+            rows = [{"key": encode_key(k), "user_id": k[0], "stats": self.stats[k].to_dict()} for k in keys if k in self.stats]
+        for i in range(0, len(rows), PAGE_SIZE):
+            self.supabase.table(STATS_TABLE).upsert(rows[i:i + PAGE_SIZE]).execute()
+
+    # --- READS ---
+    def load_user(self, user_id):
+        """(Re)reads a user's slices from the database when the local copy is missing or stale."""
+        if self.supabase is None or not self.load_existing or is_session_user(user_id):
+            return
+        loaded_at = self.loaded_users.get(user_id)
+        if loaded_at is not None and time.time() - loaded_at < STATS_TTL:
+            return
+        rows = self.supabase.table(STATS_TABLE).select("key, stats").eq("user_id", user_id).execute().data
+        with self.lock:
+            for key in [k for k in self.stats if k[0] == user_id]:
+                del self.stats[key]
+            for row in rows:
+                self.stats[tuple(row["key"].split("|", 2))] = ScoreStats.from_dict(row["stats"])
+            self.loaded_users[user_id] = time.time()
+
+    def get(self, user_id, dimension="all", value="all"):
+        self.load_user(user_id)
+        return self.stats.get((user_id, dimension, value)) or ScoreStats()
+
+    def breakdown(self, user_id, dimension):
+        """{value: ScoreStats} for one dimension (category / company / day)."""
+        self.load_user(user_id)
+        return {k[2]: s for k, s in self.stats.items() if k[0] == user_id and k[1] == dimension}
+
+
+# --- BACKFILL ---
+def backfill(supabase, page_size=PAGE_SIZE):
+    """
+    Rebuilds every aggregate from the submissions table. Rows are read
+    with keyset pagination on id, so memory stays flat however many there are.
+    """
+    analytics = SubmissionAnalytics(supabase, load_existing=False)  # Start from zero
+    question_meta, last_id, total = {}, 0, 0
+    while True:
+        rows = (supabase.table("submissions").select("*").gt("id", last_id)
+                .order("id").limit(page_size).execute().data)
+        if not rows:
+            break
+        missing = list({r["question_id"] for r in rows} - set(question_meta))
+        if missing:
+            for q in supabase.table("questions").select("id, category, company").in_("id", missing).execute().data:
+                question_meta[q["id"]] = q
+            for qid in missing:
+                question_meta.setdefault(qid, {})  # Deleted question: still count it
+        for row in rows:
+            day = (row.get("created_at") or datetime.date.today().isoformat())[:10]
+            analytics.record(row, question_meta.get(row["question_id"], {}), row.get("user_id") or ANONYMOUS, day, persist=False)
+        total += len(rows)
+        last_id = rows[-1]["id"]
+        print(f"   ↳ {total} submissions folded in")
+    analytics.save(list(analytics.stats))
+    print(f"🎉 Backfill complete: {total} submissions -> {len(analytics.stats)} aggregate rows.")
+    return analytics
+
+
+def main(argv):
+    if argv != ["backfill"]:
+        print("Usage: SUPABASE_URL=... SUPABASE_KEY=... python -m core.analytics backfill")
+        return 1
+    from supabase import create_client
+    backfill(create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,114 @@
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from core.dataset import LISTING_COLUMNS
+
+# Columns held as small integer codes into a shared list of labels
+CODED_COLUMNS = ["company", "role", "difficulty", "category"]
+
+
+class Catalog:
+    """
+    Immutable, process-wide snapshot of the question listing. Low-cardinality
+    columns are stored as categorical codes and question strings are
+    interned, so every session shares one copy. Sessions only ever hold
+    index arrays (views) into it; a refresh builds a new Catalog rather than
+    mutating this one.
+    """
+
+    def __init__(self, rows):
+        df = pd.DataFrame(list(rows), columns=LISTING_COLUMNS)
+        self.ids = self._frozen(df["id"].to_numpy())
+        self.questions = self._frozen(np.array([sys.intern(q or "") for q in df["question"]], dtype=object))
+        self.codes, self.labels = {}, {}
+        for name in CODED_COLUMNS:
+            cat = pd.Categorical(df[name].where(df[name].notna(), None))
+            self.codes[name] = self._frozen(cat.codes.astype(np.int16))  # -1 = missing
+            self.labels[name] = [sys.intern(str(label)) for label in cat.categories]
+        self.position_of = {qid: i for i, qid in enumerate(self.ids.tolist())}
+        self._views = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _frozen(arr):
+        arr.flags.writeable = False
+        return arr
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def empty(self):
+        return len(self.ids) == 0
+
+    def options(self, name):
+        """Sorted distinct values of a coded column (for filter dropdowns)."""
+        return sorted(self.labels[name])
+
+    def view(self, **filters):
+        """
+        Positions of the rows matching every filter ("All" / None = no filter).
+        Views are cached on the catalog, so sessions with the same filters
+        share the same array.
+        """
+        key = tuple(sorted((k, v) for k, v in filters.items() if v not in (None, "All")))
+        with self._lock:
+            cached = self._views.get(key)
+        if cached is not None:
+            return cached
+        mask = np.ones(len(self.ids), dtype=bool)
+        for name, value in key:
+            labels = self.labels[name]
+            code = labels.index(value) if value in labels else -2
+            mask &= self.codes[name] == code
+        positions = self._frozen(np.flatnonzero(mask).astype(np.int32))
+        with self._lock:
+            self._views[key] = positions
+        return positions
+
+    def row(self, pos):
+        """Listing fields for one position as a plain dict."""
+        out = {"id": self.ids[pos].item() if hasattr(self.ids[pos], "item") else self.ids[pos],
+               "question": self.questions[pos]}
+        for name in CODED_COLUMNS:
+            code = self.codes[name][pos]
+            out[name] = self.labels[name][code] if code >= 0 else None
+        return out
+
+    def rows(self, positions):
+        return [self.row(p) for p in positions]
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the catalog."""
+        total = self.ids.nbytes + sum(c.nbytes for c in self.codes.values())
+        # Interned strings are stored once however many rows point at them
+        total += sum(sys.getsizeof(q) for q in {id(q): q for q in self.questions}.values()) + self.questions.nbytes
+        total += sum(sys.getsizeof(label) for labels in self.labels.values() for label in labels)
+        return total
+
+
+def session_footprint(state, shared=()):
+    """
+    Rough bytes held by one session's state, not counting objects that are
+    shared process-wide (the catalog, cached question rows, ...).
+    """
+    seen = {id(obj) for obj in shared}
+
+    def size(obj):
+        if id(obj) in seen:
+            return 0
+        seen.add(id(obj))
+        if isinstance(obj, np.ndarray):
+            return 0 if not obj.flags.writeable else obj.nbytes  # Frozen arrays are catalog views
+        total = sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            total += sum(size(k) + size(v) for k, v in obj.items())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            total += sum(size(v) for v in obj)
+        return total
+
+    return sum(size(k) + size(v) for k, v in dict(state).items())
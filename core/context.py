@@ -0,0 +1,161 @@
+import math
+import re
+from collections import Counter
+
+# --- CONFIGURATION ---
+RESUME_TOKEN_BUDGET = 600
+JD_TOKEN_BUDGET = 450
+MAX_SECTION_TOKENS = 150  # Long paragraphs are split so one blob can't eat the budget
+MIN_RELEVANCE = 0.0       # Sections scoring at or below this are dropped even if they'd fit
+
+STOPWORDS = set("""
+a an and are as at be by for from has have in is it its of on or our that the their
+this to was we were will with you your i me my us they them he she his her not but
+all any can do if into more most other over so such than then there these those
+""".split())
+
+HEADING_RE = re.compile(r"^\s*([A-Z][A-Z &/\-]{2,}|[A-Za-z][\w &/\-]{1,40}:)\s*$")
+
+
+# --- TOKENS ---
+def count_tokens(text):
+    """
+    Local token estimate (no API call). Roughly matches the Llama tokenizer:
+    one token per ~4 chars of a word, one per punctuation mark.
+    """
+    pieces = re.findall(r"\w+|[^\w\s]", text or "")
+    return sum(math.ceil(len(p) / 4) if p[0].isalnum() or p[0] == "_" else 1 for p in pieces)
+
+
+def truncate_tokens(text, budget):
+    """Longest whole-word prefix of text within budget tokens."""
+    kept, used = [], 0
+    for word in text.split(" "):
+        cost = count_tokens(word)
+        if used + cost > budget:
+            break
+        kept.append(word)
+        used += cost
+    return " ".join(kept)
+
+
+def word_windows(text, max_tokens):
+    """Splits text into consecutive runs of words of at most max_tokens each."""
+    windows, rest = [], text.split()
+    while rest:
+        window = truncate_tokens(" ".join(rest), max_tokens) or rest[0]  # A single giant "word" still moves on
+        windows.append(window)
+        rest = rest[len(window.split()):]
+    return windows
+
+
+def terms(text):
+    return [w for w in re.findall(r"[a-z][a-z0-9+#.]*[a-z0-9+#]|[a-z]", text.lower()) if w not in STOPWORDS and len(w) > 1]
+
+
+# --- SECTIONS ---
+def split_sections(text, max_tokens=MAX_SECTION_TOKENS):
+    """
+    Splits a resume / JD into sections: blank lines and heading-like lines
+    start a new section, bullets stay with their heading, and anything
+    longer than max_tokens is broken up at line or sentence boundaries
+    (or, for unpunctuated text such as a flattened PDF, into word runs).
+    """
+    blocks, current = [], []
+    for line in (text or "").splitlines():
+        if not line.strip():
+            if current:
+                blocks.append(current)
+                current = []
+        elif HEADING_RE.match(line) and current:
+            blocks.append(current)
+            current = [line]
+        else:
+            current.append(line)
+    if current:
+        blocks.append(current)
+
+    sections = []
+    for block in blocks:
+        piece = []
+        for line in block:
+            parts = [line] if count_tokens(line) <= max_tokens else re.split(r"(?<=[.!?;])\s+", line)
+            parts = [w for part in parts for w in ([part] if count_tokens(part) <= max_tokens else word_windows(part, max_tokens))]
+            for part in parts:
+                if piece and count_tokens("\n".join(piece + [part])) > max_tokens:
+                    sections.append("\n".join(piece))
+                    piece = []
+                piece.append(part)
+        if piece:
+            sections.append("\n".join(piece))
+    return [s.strip() for s in sections if s.strip()]
+
+
+# --- SCORING ---
+def tfidf_vectors(docs):
+    """Returns one {term: weight} dict per doc, L2-normalized."""
+    tokenized = [Counter(terms(d)) for d in docs]
+    df = Counter(t for tf in tokenized for t in tf)
+    n = len(docs)
+    vectors = []
+    for tf in tokenized:
+        vec = {t: (1 + math.log(c)) * math.log((1 + n) / (1 + df[t]) + 1) for t, c in tf.items()}
+        norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+        vectors.append({t: v / norm for t, v in vec.items()})
+    return vectors
+
+
+def cosine(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(t, 0.0) for t, v in a.items())
+
+
+def score_sections(sections, other_sections):
+    """Scores each section by TF-IDF similarity to the other document as a whole."""
+    vectors = tfidf_vectors(sections + ["\n".join(other_sections)])
+    target = vectors[-1]
+    return [cosine(v, target) for v in vectors[:-1]]
+
+
+# --- PACKING ---
+def pack_sections(sections, scores, budget, pinned=(), min_relevance=MIN_RELEVANCE):
+    """
+    Greedily keeps the highest-scoring sections that fit in the token
+    budget (pinned indexes go first), then restores document order.
+    Irrelevant sections are left out so the prompt only costs what it needs;
+    if nothing is relevant at all we fall back to the top of the document.
+    """
+    if not any(score > min_relevance for score in scores):
+        scores, min_relevance = [-i for i in range(len(sections))], -len(sections)
+
+    chosen, used = set(), 0
+    order = list(pinned) + sorted(range(len(sections)), key=lambda i: scores[i], reverse=True)
+    for i in order:
+        if i in chosen or (i not in pinned and scores[i] <= min_relevance):
+            continue
+        cost = count_tokens(sections[i])
+        if used + cost <= budget:
+            chosen.add(i)
+            used += cost
+    if not chosen and sections:
+        # Every section is bigger than the budget: send the best one, trimmed
+        return truncate_tokens(sections[order[0]], budget)
+    return "\n\n".join(sections[i] for i in sorted(chosen))
+
+
+def pack_context(resume_text, jd_text, resume_budget=RESUME_TOKEN_BUDGET, jd_budget=JD_TOKEN_BUDGET):
+    """
+    Replaces fixed-length truncation: returns (resume, jd) trimmed to the
+    sections that overlap most with each other, within the token budgets.
+    """
+    resume_sections = split_sections(resume_text)
+    jd_sections = split_sections(jd_text)
+    if not resume_sections or not jd_sections:
+        return resume_text[: resume_budget * 4], jd_text[: jd_budget * 4]
+
+    resume_scores = score_sections(resume_sections, jd_sections)
+    jd_scores = score_sections(jd_sections, resume_sections)
+    # The JD opener usually names the company and role, which the prompt asks for
+    return (pack_sections(resume_sections, resume_scores, resume_budget),
+            pack_sections(jd_sections, jd_scores, jd_budget, pinned=[0]))
@@ -0,0 +1,132 @@
+import json
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+# Parquet (.parquet) is the default on-disk format, Arrow IPC (.arrow) gives
+# zero-copy memory-mapped reads, and JSON stays as an import/export format.
+
+# Low-cardinality columns stored dictionary-encoded
+CATEGORICAL_COLUMNS = ["company", "role", "experience", "category", "difficulty", "source_type"]
+
+# Everything the Arena listing needs (no ideal_answer)
+LISTING_COLUMNS = ["id", "question", "company", "role", "difficulty", "category"]
+
+
+def _is_json(path):
+    return path.lower().endswith(".json")
+
+
+def _is_arrow(path):
+    return path.lower().endswith((".arrow", ".feather"))
+
+
+def prefer_columnar(path):
+    """
+    For a .json path, returns its .parquet / .arrow sibling when one exists
+    and is at least as new (as written by `python -m core.dataset convert`),
+    so readers get projected, memory-mapped reads. Otherwise returns path.
+    """
+    if not _is_json(path):
+        return path
+    stem = path[: -len(".json")]
+    for candidate in (f"{stem}.arrow", f"{stem}.parquet"):
+        if os.path.exists(candidate) and (not os.path.exists(path) or os.path.getmtime(candidate) >= os.path.getmtime(path)):
+            return candidate
+    return path
+
+
+def _read_json_records(path, columns=None):
+    """
+    JSON rows as dicts over the union of all keys (None where a row lacks
+    one). Arrow would infer the schema from the first row and silently drop
+    keys it doesn't have.
+    """
+    with open(path) as f:
+        rows = json.load(f)
+    names = columns or list(dict.fromkeys(k for row in rows for k in row))
+    return [{c: row.get(c) for c in names} for row in rows]
+
+
+# --- WRITING ---
+def to_table(data):
+    """Records / DataFrame -> Arrow table with categorical columns dictionary-encoded."""
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(list(data))
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for name in CATEGORICAL_COLUMNS:
+        idx = table.schema.get_field_index(name)
+        if idx == -1:
+            continue
+        col_type = table.schema.field(idx).type
+        if pa.types.is_string(col_type) or pa.types.is_large_string(col_type):
+            table = table.set_column(idx, name, table.column(name).dictionary_encode())
+    return table
+
+
+def write_dataset(data, path):
+    """Writes records / a DataFrame as Parquet, Arrow IPC or JSON depending on the extension."""
+    if _is_json(path):
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(list(data))
+        df.to_json(path, orient="records", indent=2)
+        return
+    table = to_table(data)
+    tmp = f"{path}.tmp"
+    if _is_arrow(path):
+        # Uncompressed so readers can memory-map columns without decoding
+        with pa.OSFile(tmp, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)  # Never leave a half-written checkpoint behind
+
+
+# --- READING ---
+def read_table(path, columns=None):
+    """
+    Memory-mapped, column-projected read. Columns that aren't requested
+    are never decoded (Parquet) or paged in (Arrow IPC).
+    """
+    if _is_json(path):
+        table = pa.Table.from_pylist(_read_json_records(path))
+    elif _is_arrow(path):
+        table = ipc.open_file(pa.memory_map(path, "r")).read_all()
+    else:
+        names = pq.read_schema(path).names
+        cols = [c for c in columns if c in names] if columns else None
+        return pq.read_table(path, columns=cols, memory_map=True)
+    return table.select([c for c in columns if c in table.column_names]) if columns else table
+
+
+def read_dataset(path, columns=None):
+    """Same as read_table, as a DataFrame (dictionary columns become pandas categoricals)."""
+    if _is_json(path):
+        return pd.DataFrame(_read_json_records(path, columns))  # Tolerates mixed-type columns
+    return read_table(path, columns).to_pandas()
+
+
+def read_records(path, columns=None):
+    """Same as read_table, as a list of dicts with None for missing values."""
+    if _is_json(path):
+        return _read_json_records(path, columns)  # Plain json.load: no schema inference to trip over
+    return read_table(path, columns).to_pylist()
+
+
+# --- CLI ---
+def main(argv):
+    if len(argv) != 3 or argv[0] != "convert":
+        print("Usage: python -m core.dataset convert bleet_seeded_data.json bleet_seeded_data.parquet")
+        print("Formats by extension: .parquet, .arrow, .json")
+        return 1
+    src, dst = argv[1], argv[2]
+    table = read_table(src)
+    write_dataset(table.to_pandas(), dst)
+    print(f"✅ {src} -> {dst} ({table.num_rows} rows, {os.path.getsize(dst) / 1024:.0f} KB)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
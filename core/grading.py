@@ -0,0 +1,347 @@
+import json
+import re
+import time
+
+from groq import APIError
+
+# --- CONFIGURATION ---
+# Cheapest model first. Each step up the ladder is only used when the
+# previous model's grade is borderline or it isn't confident about it.
+MODEL_LADDER = ["llama-3.1-8b-instant", "llama-3.3-70b-versatile"]
+
+MIN_WORDS = 25               # Below this the answer can't be a real STAR story
+BORDERLINE_RANGE = (45, 80)  # Scores in here get a second opinion
+MIN_CONFIDENCE = 70          # Self-reported confidence below this escalates
+MAX_RETRIES = 2              # Extra attempts per model when the JSON is malformed or the API hiccups
+RETRY_BACKOFF = 0.5          # Seconds before the first API-error retry, doubled each time
+
+VERDICTS = ["Strong Hire", "Hire", "Weak Hire", "No Hire"]
+
+STAR_KEYWORDS = {
+    "situation": ["situation", "context", "background", "when i was", "at my", "we were", "project"],
+    "task": ["task", "goal", "responsible", "needed to", "had to", "objective", "challenge"],
+    "action": ["i decided", "i led", "i built", "i worked", "i talked", "i proposed", "i organized", "action", "so i", "i started"],
+    "result": ["result", "outcome", "learned", "improved", "reduced", "increased", "delivered", "impact", "as a result", "%"],
+}
+
+
+# --- LOCAL PRE-CHECK ---
+def precheck_transcript(user_transcript, min_words=MIN_WORDS):
+    """
+    Cheap local check before any API call.
+    Returns (result, coverage). result is None if the answer should go to
+    the model ladder, otherwise it is the final grade dict.
+    """
+    text = (user_transcript or "").strip().lower()
+    words = re.findall(r"[a-z0-9']+", text)
+    coverage = {part: any(k in text for k in keys) for part, keys in STAR_KEYWORDS.items()}
+
+    if not words:
+        return make_result(0, "No Hire", "No answer was detected in the recording. Try again and speak clearly into the mic."), coverage
+
+    if len(words) < min_words:
+        missing = [part.title() for part, hit in coverage.items() if not hit]
+        advice = f"Your answer was only {len(words)} words - too short to be graded as a STAR story."
+        if missing:
+            advice += f" Add a clear {', '.join(missing)}."
+        return make_result(5, "No Hire", advice), coverage
+
+    return None, coverage
+
+
+# --- STRUCTURED OUTPUT ---
+def build_grading_prompt(user_transcript, ideal_answer, question_text, coverage=None):
+    hint = ""
+    if coverage:
+        missing = [part.title() for part, hit in coverage.items() if not hit]
+        if missing:
+            hint = f"\n    (Pre-check: no obvious {', '.join(missing)} section detected.)"
+    return f"""
+    Role: Senior Recruiter.
+    Question: "{question_text}"
+    Candidate Answer: "{user_transcript}"
+
+    Task: Grade based on Relevance, STAR Structure, and Clarity.
+    (Ref Answer Strategy: "{ideal_answer}"){hint}
+
+    OUTPUT FORMAT:
+    Return ONLY a JSON object with the keys in exactly this order:
+    {{
+        "score": 0-100 (integer),
+        "verdict": "Strong Hire" OR "Hire" OR "Weak Hire" OR "No Hire",
+        "confidence": 0-100 (integer, how sure you are of this score),
+        "feedback": "Specific advice"
+    }}
+    """
+
+
+def make_result(score, verdict, feedback, confidence=100, model=None):
+    return {"score": score, "verdict": verdict, "confidence": confidence,
+            "feedback": feedback, "model": model, "done": True}
+
+
+def format_feedback(result):
+    """Plain-text version of a grade, used for the ai_feedback column."""
+    return f"Score: {result['score']}\nVerdict: {result['verdict']}\nFeedback: {result['feedback']}"
+
+
+def validate_result(fields):
+    """Checks a fully parsed grade and normalizes it. Raises ValueError if malformed."""
+    score = fields.get("score")
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 100:
+        raise ValueError(f"Invalid score: {score!r}")
+
+    verdict = str(fields.get("verdict", "")).strip()
+    matches = [v for v in VERDICTS if v.lower() == verdict.lower()]
+    if not matches:
+        raise ValueError(f"Invalid verdict: {verdict!r}")
+
+    feedback = fields.get("feedback")
+    if not isinstance(feedback, str) or not feedback.strip():
+        raise ValueError("Missing feedback")
+
+    confidence = fields.get("confidence", 0)
+    if isinstance(confidence, bool) or not isinstance(confidence, (int, float)):
+        confidence = 0
+    return make_result(int(score), matches[0], feedback.strip(), int(confidence))
+
+
+class FeedbackStreamParser:
+    """
+    Incremental parser for the flat JSON object the grader streams back.
+    Scalars are published once complete; string values are published
+    character by character so feedback can render while it's generated.
+    """
+    ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self):
+        self.fields = {}
+        self.state = "start"
+        self.key = ""
+        self.buf = ""
+        self.escape = None  # None, "" (after backslash) or the \u digits so far
+
+    def feed(self, text):
+        """Consumes a chunk. Returns the set of field names that changed."""
+        changed = set()
+        for ch in text:
+            self._step(ch, changed)
+        return changed
+
+    @property
+    def complete(self):
+        return self.state == "done"
+
+    def _step(self, ch, changed):
+        state = self.state
+        if state == "start":
+            # Tolerate preamble / markdown fences before the object
+            if ch == "{":
+                self.state = "key_wait"
+        elif state == "key_wait":
+            if ch == '"':
+                self.key, self.buf, self.state = "", "", "key"
+            elif ch == "}":
+                self.state = "done"
+            elif not ch.isspace() and ch != ",":
+                raise ValueError(f"Unexpected {ch!r} before key")
+        elif state == "key":
+            if self._string_char(ch):
+                self.key, self.buf = self.buf, ""
+                self.state = "colon"
+        elif state == "colon":
+            if ch == ":":
+                self.state = "value_wait"
+            elif not ch.isspace():
+                raise ValueError(f"Expected ':' after {self.key!r}")
+        elif state == "value_wait":
+            if ch == '"':
+                self.buf = ""
+                self.fields[self.key] = ""
+                changed.add(self.key)
+                self.state = "string"
+            elif ch in "{[":
+                raise ValueError(f"Nested value for {self.key!r}")
+            elif not ch.isspace():
+                self.buf = ch
+                self.state = "scalar"
+        elif state == "string":
+            closed = self._string_char(ch)
+            self.fields[self.key] = self.buf
+            changed.add(self.key)
+            if closed:
+                self.state = "after_value"
+        elif state == "scalar":
+            if ch in ",}" or ch.isspace():
+                try:
+                    self.fields[self.key] = json.loads(self.buf)
+                except ValueError:
+                    raise ValueError(f"Invalid value for {self.key!r}: {self.buf!r}")
+                changed.add(self.key)
+                self.state = "after_value"
+                if not ch.isspace():
+                    self._step(ch, changed)
+            else:
+                self.buf += ch
+        elif state == "after_value":
+            if ch == ",":
+                self.state = "key_wait"
+            elif ch == "}":
+                self.state = "done"
+            elif not ch.isspace():
+                raise ValueError(f"Unexpected {ch!r} after {self.key!r}")
+        # "done": ignore trailing text
+
+    def _string_char(self, ch):
+        """Appends one char of a JSON string to buf. Returns True on the closing quote."""
+        if self.escape is not None:
+            if self.escape == "" and ch != "u":
+                if ch not in self.ESCAPES:
+                    raise ValueError(f"Bad escape \\{ch}")
+                self.buf += self.ESCAPES[ch]
+                self.escape = None
+            else:
+                self.escape += ch
+                if len(self.escape) == 5:  # "u" + 4 hex digits
+                    code = int(self.escape[1:], 16)
+                    if 0xDC00 <= code <= 0xDFFF and self.buf and 0xD800 <= ord(self.buf[-1]) <= 0xDBFF:
+                        # Second half of a surrogate pair (emoji etc.)
+                        code = 0x10000 + ((ord(self.buf[-1]) - 0xD800) << 10) + (code - 0xDC00)
+                        self.buf = self.buf[:-1]
+                    self.buf += chr(code)
+                    self.escape = None
+            return False
+        if ch == "\\":
+            self.escape = ""
+            return False
+        if ch == '"':
+            return True
+        self.buf += ch
+        return False
+
+
+# --- MODEL LADDER ---
+def needs_escalation(result, borderline=BORDERLINE_RANGE, min_confidence=MIN_CONFIDENCE):
+    low, high = borderline
+    if low <= result["score"] <= high:
+        return True
+    return result["confidence"] < min_confidence
+
+
+def is_retryable(error):
+    """Rate limits, server errors and dropped connections are worth another try; other 4xx are not."""
+    status = getattr(error, "status_code", None)
+    return status is None or status in (408, 409, 429) or status >= 500
+
+
+def escalation_decision(state, borderline=BORDERLINE_RANGE, min_confidence=MIN_CONFIDENCE):
+    """True / False once a partial grade has a usable score and confidence, None until then."""
+    def number(value):
+        return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+    score, confidence = number(state["score"]), number(state.get("confidence"))
+    if state["done"]:
+        return needs_escalation(state, borderline, min_confidence)
+    if score is None or confidence is None:
+        return None
+    return needs_escalation({"score": score, "confidence": confidence}, borderline, min_confidence)
+
+
+def stream_model_grade(prompt, model, groq_client, max_retries=MAX_RETRIES):
+    """
+    Streams one model's grade. Yields partial state dicts as fields arrive;
+    the last one has done=True. Malformed output and transient API errors
+    are retried from scratch; anything else raises for the ladder to handle.
+    """
+    last_error = None
+    for attempt in range(max_retries + 1):
+        parser = FeedbackStreamParser()
+        state = {"score": None, "verdict": None, "confidence": None, "feedback": "", "model": model,
+                 "attempt": attempt, "done": False}
+        stream = None
+        try:
+            # No response_format: JSON mode isn't reliably available with
+            # streaming, and the parser below validates the object anyway
+            stream = groq_client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                stream=True,
+            )
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                changed = parser.feed(delta)
+                if changed & {"score", "verdict", "confidence", "feedback"}:
+                    state.update({k: parser.fields[k] for k in changed if k in state})
+                    yield dict(state)
+            if not parser.complete:
+                raise ValueError("Stream ended before the JSON object closed")
+            result = validate_result(parser.fields)
+            result["model"], result["attempt"] = model, attempt
+            yield result
+            return
+        except ValueError as e:
+            last_error = e
+        except APIError as e:
+            last_error = e
+            if not is_retryable(e) or attempt == max_retries:
+                break
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
+        finally:
+            if stream is not None and hasattr(stream, "close"):
+                stream.close()  # Also runs when the caller stops reading early
+    raise ValueError(f"{model} failed to grade after {attempt + 1} attempts: {last_error}")
+
+
+def grade_answer_stream(user_transcript, ideal_answer, question_text, groq_client,
+                        models=MODEL_LADDER, borderline=BORDERLINE_RANGE,
+                        min_confidence=MIN_CONFIDENCE, min_words=MIN_WORDS):
+    """
+    Tiered, streamed grading: local pre-check -> fast model -> bigger model(s).
+    Yields partial state dicts (score / verdict / feedback so far, plus the
+    model producing them). The final yield is the finished grade with done=True.
+
+    A model that may still be escalated is buffered until its score and
+    confidence are in, so the UI never shows a grade that is then replaced.
+    """
+    local_result, coverage = precheck_transcript(user_transcript, min_words)
+    if local_result is not None:
+        yield local_result
+        return
+
+    prompt = build_grading_prompt(user_transcript, ideal_answer, question_text, coverage)
+    for i, model in enumerate(models):
+        is_last = i == len(models) - 1
+        held, decided = [], is_last
+        grades = stream_model_grade(prompt, model, groq_client)
+        try:
+            for state in grades:
+                if not decided:
+                    if held and held[-1].get("attempt") != state.get("attempt"):
+                        held = []  # A retry starts the grade over
+                    held.append(state)
+                    escalate = escalation_decision(state, borderline, min_confidence)
+                    if escalate is None:
+                        continue
+                    if escalate:
+                        # Borderline: drop it unseen; the next model re-grades from scratch
+                        break
+                    decided = True
+                    yield from held[:-1]
+                yield state
+            else:
+                return
+        except ValueError:
+            if is_last:
+                raise
+        finally:
+            grades.close()
+
+
+def grade_answer(user_transcript, ideal_answer, question_text, groq_client, **kwargs):
+    """Non-streaming wrapper. Returns the final grade dict."""
+    result = None
+    for state in grade_answer_stream(user_transcript, ideal_answer, question_text, groq_client, **kwargs):
+        result = state
+    return result
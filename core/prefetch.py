@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+
+# --- CONFIGURATION ---
+MAX_CACHED_ROWS = 500     # Full question rows (with ideal_answer) kept in memory
+ROW_TTL = 300             # Seconds before a cached row is re-read (edits / deletes show up)
+MAX_WORKERS = 4
+CONNECTION_WARM_EVERY = 60  # Seconds between keep-alive pings to Groq
+
+
+class Prefetcher:
+    """
+    Background warmer shared by all sessions. Full question rows are
+    fetched in batches ahead of the click, slow listings are served
+    stale-while-revalidate, and the Groq connection is kept warm.
+
+    Cached rows are shared by every session, so they are handed out as
+    read-only mappings; copy one with dict(row) before changing it.
+    """
+
+    def __init__(self, supabase, max_rows=MAX_CACHED_ROWS, max_workers=MAX_WORKERS, row_ttl=ROW_TTL):
+        self.supabase = supabase
+        self.max_rows = max_rows
+        self.row_ttl = row_ttl
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bleet-prefetch")
+        self.rows = OrderedDict()   # id -> full row, read-only (LRU)
+        self.fetched_at = {}        # id -> when the row was read
+        self.pending = {}           # id -> Future of the batch fetching it
+        self.snapshots = {}         # key -> (fetched_at, value)
+        self.refreshing = set()
+        self.last_warm = 0.0
+        self.lock = threading.Lock()
+
+    # --- QUESTION ROWS ---
+    def warm(self, ids):
+        """Starts one background query for every id not already cached or in flight."""
+        with self.lock:
+            missing = list(dict.fromkeys(str(i) for i in ids if not self._fresh(str(i)) and str(i) not in self.pending))
+            if not missing:
+                return
+            future = self.pool.submit(self._fetch_rows, missing)
+            for key in missing:
+                self.pending[key] = future
+
+    def get(self, question_id):
+        """
+        Full row for one question: cached, joined from an in-flight prefetch,
+        or fetched now. None if the question has been deleted.
+        """
+        key = str(question_id)
+        with self.lock:
+            if self._fresh(key):
+                self.rows.move_to_end(key)
+                return self.rows[key]
+            future = self.pending.get(key)
+        if future is not None:
+            try:
+                future.result()
+            except Exception:
+                pass
+            with self.lock:
+                if self._fresh(key):
+                    return self.rows[key]
+        rows = self.supabase.table("questions").select("*").eq("id", question_id).limit(1).execute().data
+        self._store(rows, [key])
+        with self.lock:
+            return self.rows.get(key)
+
+    def put(self, rows):
+        """
+        Seeds the cache with rows we already have in hand (e.g. just
+        inserted). Returns the cached read-only copies.
+        """
+        self._store(rows)
+        with self.lock:
+            return [self.rows.get(str(row["id"])) for row in rows]
+
+    def _fresh(self, key):
+        return key in self.rows and time.time() - self.fetched_at[key] < self.row_ttl
+
+    def _fetch_rows(self, keys):
+        try:
+            rows = self.supabase.table("questions").select("*").in_("id", keys).execute().data
+            self._store(rows, keys)
+        finally:
+            with self.lock:
+                for key in keys:
+                    self.pending.pop(key, None)
+
+    def _store(self, rows, requested=()):
+        """Caches read-only copies of rows; requested ids that came back empty were deleted."""
+        now = time.time()
+        with self.lock:
+            for key in set(requested) - {str(row["id"]) for row in rows if row}:
+                self.rows.pop(key, None)
+                self.fetched_at.pop(key, None)
+            for row in rows:
+                if row:
+                    key = str(row["id"])
+                    self.rows[key] = MappingProxyType(dict(row))
+                    self.rows.move_to_end(key)
+                    self.fetched_at[key] = now
+            while len(self.rows) > self.max_rows:
+                key, _ = self.rows.popitem(last=False)
+                self.fetched_at.pop(key, None)
+
+    # --- LISTINGS ---
+    def snapshot(self, key, fetch, ttl):
+        """
+        Stale-while-revalidate: returns the last value of fetch() at once and
+        refreshes it in the background once it is older than ttl seconds.
+        Only the very first call for a key blocks.
+        """
+        with self.lock:
+            cached = self.snapshots.get(key)
+            stale = cached is None or time.time() - cached[0] > ttl
+            if cached is not None and stale and key not in self.refreshing:
+                self.refreshing.add(key)
+                self.pool.submit(self._refresh, key, fetch)
+        if cached is None:
+            value = fetch()
+            with self.lock:
+                self.snapshots[key] = (time.time(), value)
+            return value
+        return cached[1]
+
+    def _refresh(self, key, fetch):
+        try:
+            value = fetch()
+            with self.lock:
+                self.snapshots[key] = (time.time(), value)
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+
+    # --- CONNECTIONS ---
+    def warm_connection(self, groq_client):
+        """Cheap background request so grading reuses an open TLS connection."""
+        with self.lock:
+            if time.time() - self.last_warm < CONNECTION_WARM_EVERY:
+                return
+            self.last_warm = time.time()
+        self.pool.submit(self._ping, groq_client)
+
+    @staticmethod
+    def _ping(groq_client):
+        try:
+            groq_client.models.list()
+        except Exception:
+            pass  # Best effort; the real request will surface any error
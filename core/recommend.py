@@ -0,0 +1,158 @@
+import re
+import threading
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+# --- CONFIGURATION ---
+N_FEATURES = 1024         # Hashed vocabulary size (5000 questions ~ 20MB float32)
+DUPLICATE_SIMILARITY = 0.9  # Anything this close to an answered question counts as answered
+SIMILARITY_WEIGHT = 0.6   # Pull toward questions like the ones you did badly on
+WEAKNESS_WEIGHT = 0.4     # Pull toward categories with low average score
+DEFAULT_WEAKNESS = 0.5    # Categories you've never practiced
+
+TOKEN_RE = re.compile(r"[a-z][a-z']+")
+
+
+def hash_features(text, n_features=N_FEATURES):
+    """Unigram + bigram feature indexes for one text (stable across processes)."""
+    words = TOKEN_RE.findall((text or "").lower())
+    grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return [zlib.crc32(g.encode()) % n_features for g in grams]
+
+
+class QuestionIndex:
+    """
+    In-process embedding of the question bank as a hashed TF-IDF matrix.
+    Rows are added incrementally; the IDF-weighted, normalized matrix is
+    rebuilt lazily on the next query. Safe to share between sessions.
+    """
+
+    def __init__(self, n_features=N_FEATURES):
+        self.n_features = n_features
+        self.ids = []
+        self.questions = []
+        self.categories = []
+        self.row_of = {}
+        self.removed = set()        # Rows of deleted questions, never suggested again
+        self.tf = np.zeros((0, n_features), dtype=np.float32)
+        self.df = np.zeros(n_features, dtype=np.float32)
+        self._weighted = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, questions):
+        """Adds question dicts (id, question, category). Known ids are skipped."""
+        with self._lock:
+            new = [q for q in questions if q.get("id") is not None and q["id"] not in self.row_of]
+            if not new:
+                return
+            rows = np.zeros((len(new), self.n_features), dtype=np.float32)
+            for r, q in enumerate(new):
+                np.add.at(rows[r], hash_features(f"{q.get('question', '')} {q.get('category', '')}", self.n_features), 1.0)
+                self.row_of[q["id"]] = len(self.ids)
+                self.ids.append(q["id"])
+                self.questions.append(q.get("question") or "")
+                self.categories.append(q.get("category") or "Behavioral")
+            rows = np.log1p(rows)  # Sublinear tf
+            self.df += (rows > 0).sum(axis=0)
+            self.tf = np.vstack([self.tf, rows])
+            self._weighted = None
+
+    def discard(self, question_ids):
+        """Stops suggesting questions that no longer exist (their rows stay in the matrix)."""
+        with self._lock:
+            self.removed.update(self.row_of[q] for q in question_ids if q in self.row_of)
+
+    @property
+    def matrix(self):
+        weighted = self._weighted
+        if weighted is None:
+            with self._lock:
+                idf = np.log((1 + len(self.ids)) / (1 + self.df)) + 1
+                weighted = self.tf * idf
+                norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                weighted = self._weighted = weighted / norms
+        return weighted
+
+    def question(self, question_id):
+        return self.questions[self.row_of[question_id]]
+
+    def category(self, question_id):
+        return self.categories[self.row_of[question_id]]
+
+    def similar(self, question_id, k=5):
+        """Top-k most similar questions to one question, as [(id, similarity)]."""
+        row = self.row_of.get(question_id)
+        if row is None:
+            return []
+        matrix = self.matrix
+        sims = matrix @ matrix[row]
+        sims[row] = -np.inf
+        sims[list(self.removed)] = -np.inf
+        return self._top_k(sims, k)
+
+    def recommend(self, history, k=5):
+        """
+        Next-question picks from a user's submission history
+        ([{"question_id", "ai_score"}]). Favors weak categories and questions
+        like the ones graded low, and skips anything effectively answered.
+        """
+        if not self.ids:
+            return []
+        matrix = self.matrix
+        # Snapshot: rows added by another session after this point are ignored
+        n = matrix.shape[0]
+        categories = self.categories[:n]
+
+        # Per-category weakness in [0, 1] from mean score
+        scores_by_cat = defaultdict(list)
+        answered_rows, answered_weights = [], []
+        for sub in history:
+            row = self.row_of.get(sub.get("question_id"))
+            if row is None or row >= n:
+                continue
+            score = sub.get("ai_score") or 0
+            scores_by_cat[self.categories[row]].append(score)
+            answered_rows.append(row)
+            answered_weights.append(1.0 - score / 100.0)
+        weakness = {cat: 1.0 - np.mean(s) / 100.0 for cat, s in scores_by_cat.items()}
+        cat_weakness = np.array([weakness.get(c, DEFAULT_WEAKNESS) for c in categories], dtype=np.float32)
+
+        if answered_rows:
+            answered = matrix[answered_rows]
+            # Profile leans toward the answers that went badly
+            weights = np.array(answered_weights, dtype=np.float32) + 1e-3
+            profile = weights @ answered
+            profile /= np.linalg.norm(profile) or 1.0
+            affinity = matrix @ profile
+            already = (matrix @ answered.T).max(axis=1) >= DUPLICATE_SIMILARITY
+        else:
+            affinity = np.zeros(n, dtype=np.float32)
+            already = np.zeros(n, dtype=bool)
+
+        combined = SIMILARITY_WEIGHT * affinity + WEAKNESS_WEIGHT * cat_weakness
+        combined[already] = -np.inf
+        combined[[r for r in self.removed if r < n]] = -np.inf
+
+        # Walk the ranking, dropping near-duplicates of higher-ranked picks
+        picks = []
+        for row in np.argsort(-combined):
+            if not np.isfinite(combined[row]) or len(picks) == k:
+                break
+            if picks and (matrix[[p for p, _ in picks]] @ matrix[row]).max() >= DUPLICATE_SIMILARITY:
+                continue
+            picks.append((row, float(combined[row])))
+        return [(self.ids[row], score) for row, score in picks]
+
+    def _top_k(self, scores, k):
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[i], float(scores[i])) for i in top]
@@ -0,0 +1,192 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from urllib.parse import urlencode
+
+import httpx
+
+# --- CONFIGURATION ---
+STORE_FILE = ".bleet_sessions.json"
+SESSION_COOKIE = "bleet_session"  # Cookie carrying the signed session id
+LOGIN_PARAM = "login"        # Query param tying the OAuth redirect back to its verifier
+LOGIN_TTL = 600              # Seconds a started login stays valid
+REFRESH_MARGIN = 300         # Refresh tokens this many seconds before they expire
+REFRESH_EVERY = 60           # How often the background refresher wakes up
+SESSION_MAX_AGE = 30 * 24 * 3600
+
+
+# --- SIGNING ---
+def sign(value, secret):
+    mac = hmac.new(secret.encode(), value.encode(), hashlib.sha256).hexdigest()[:32]
+    return f"{value}.{mac}"
+
+
+def unsign(token, secret):
+    """Returns the signed value, or None if the token was tampered with."""
+    value = (token or "").rpartition(".")[0]
+    if value and hmac.compare_digest(sign(value, secret), token):
+        return value
+    return None
+
+
+class SessionStore:
+    """
+    Server-side store of Supabase sessions, keyed by an opaque id. Only the
+    signed id ever leaves the server; tokens stay in a local file that
+    survives restarts. A daemon thread refreshes tokens before they
+    expire so page loads never wait on the auth server.
+
+    Everything talks to GoTrue over plain HTTP rather than through a
+    supabase client, whose auth state would be shared by every user.
+    """
+
+    def __init__(self, supabase_url, supabase_key, secret, path=STORE_FILE):
+        if not secret:
+            raise ValueError("A session secret is required to sign session ids.")
+        self.auth_url = f"{supabase_url.rstrip('/')}/auth/v1"
+        self.supabase_key = supabase_key
+        self.secret = secret
+        self.path = path
+        self.lock = threading.Lock()
+        self.sessions = self._load()
+        self.logins = {}            # login nonce -> (started_at, PKCE verifier)
+        self.refreshing = set()     # sids with a refresh in flight
+        self._refresher = None
+
+    # --- PERSISTENCE ---
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (ValueError, OSError):
+            return {}
+
+    def _save(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.sessions, f)
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, self.path)
+
+    def _post(self, path, body):
+        return httpx.post(f"{self.auth_url}/{path}", json=body, headers={"apikey": self.supabase_key}, timeout=10)
+
+    # --- LOGIN (PKCE) ---
+    def authorize_url(self, provider, redirect_to):
+        """
+        Starts one login: a fresh PKCE verifier is kept server-side under a
+        one-time nonce that comes back on the redirect.
+        """
+        verifier = secrets.token_urlsafe(64)
+        challenge = base64.urlsafe_b64encode(hashlib.sha256(verifier.encode()).digest()).rstrip(b"=").decode()
+        nonce = secrets.token_urlsafe(16)
+        with self.lock:
+            now = time.time()
+            self.logins = {k: v for k, v in self.logins.items() if now - v[0] < LOGIN_TTL}
+            self.logins[nonce] = (now, verifier)
+        query = urlencode({
+            "provider": provider,
+            "redirect_to": f"{redirect_to}?{urlencode({LOGIN_PARAM: nonce})}",
+            "code_challenge": challenge,
+            "code_challenge_method": "s256",
+        })
+        return f"{self.auth_url}/authorize?{query}"
+
+    def finish_login(self, nonce, code):
+        """Trades the OAuth code for tokens and returns the signed session id."""
+        with self.lock:
+            started = self.logins.pop(nonce, None)
+        if started is None or time.time() - started[0] > LOGIN_TTL:
+            raise ValueError("This login link has expired, please sign in again.")
+        response = self._post("token?grant_type=pkce", {"auth_code": code, "code_verifier": started[1]})
+        if response.status_code != 200:
+            raise ValueError(f"Token exchange failed ({response.status_code}): {response.text[:200]}")
+        return self.create(response.json())
+
+    # --- SESSIONS ---
+    def create(self, data):
+        """Stores a GoTrue token response and returns the signed id for the client."""
+        sid = secrets.token_urlsafe(24)
+        user = data.get("user") or {}
+        with self.lock:
+            self.sessions[sid] = {
+                "access_token": data["access_token"],
+                "refresh_token": data["refresh_token"],
+                "expires_at": data.get("expires_at") or time.time() + data.get("expires_in", 3600),
+                "user_id": user.get("id"),
+                "email": user.get("email"),
+                "created_at": time.time(),
+            }
+            self._save()
+        return sign(sid, self.secret)
+
+    def get(self, signed_sid):
+        sid = unsign(signed_sid, self.secret)
+        with self.lock:
+            session = self.sessions.get(sid) if sid else None
+        if session and time.time() - session["created_at"] > SESSION_MAX_AGE:
+            self.delete(signed_sid)
+            return None
+        if session and session["expires_at"] - time.time() < REFRESH_MARGIN and sid not in self.refreshing:
+            # Serve what we have; the refresh happens off the request path
+            threading.Thread(target=self.refresh, args=(sid,), daemon=True).start()
+        return session
+
+    def delete(self, signed_sid):
+        sid = unsign(signed_sid, self.secret)
+        with self.lock:
+            if self.sessions.pop(sid, None) is not None:
+                self._save()
+
+    # --- REFRESH ---
+    def refresh(self, sid):
+        # Refresh tokens rotate: a second concurrent refresh would get a 400
+        # and log the user out, so each sid has at most one in flight
+        with self.lock:
+            session = self.sessions.get(sid)
+            if not session or sid in self.refreshing:
+                return
+            self.refreshing.add(sid)
+        try:
+            self._refresh(sid, session)
+        finally:
+            with self.lock:
+                self.refreshing.discard(sid)
+
+    def _refresh(self, sid, session):
+        try:
+            response = self._post("token?grant_type=refresh_token", {"refresh_token": session["refresh_token"]})
+        except httpx.HTTPError:
+            return  # Network blip: keep the session and try again next round
+        with self.lock:
+            if response.status_code == 200:
+                data = response.json()
+                session.update({
+                    "access_token": data["access_token"],
+                    "refresh_token": data["refresh_token"],
+                    "expires_at": data.get("expires_at") or time.time() + data.get("expires_in", 3600),
+                })
+            elif response.status_code in (400, 401):
+                self.sessions.pop(sid, None)  # Refresh token revoked or already used
+            self._save()
+
+    def start_refresher(self):
+        if self._refresher is not None:
+            return
+        self._refresher = threading.Thread(target=self._refresh_loop, daemon=True, name="bleet-session-refresh")
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            with self.lock:
+                due = [sid for sid, s in self.sessions.items() if s["expires_at"] - time.time() < REFRESH_MARGIN]
+            for sid in due:
+                self.refresh(sid)
+            time.sleep(REFRESH_EVERY)
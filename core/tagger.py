@@ -0,0 +1,298 @@
+import sys
+from collections import Counter, defaultdict, deque
+
+import numpy as np
+
+from core.recommend import hash_features
+
+# --- CONFIGURATION ---
+SEED_FILE = "bleet_seeded_data.json"  # A newer .parquet / .arrow copy is read instead when present
+N_FEATURES = 2048        # Hashed unigram + bigram space
+EPOCHS = 150
+LEARNING_RATE = 0.5
+L2 = 1e-4
+KEYWORD_WEIGHT = 0.6     # How much keyword hits can move the classifier's category
+MAX_KEYWORDS = 5
+EVAL_FOLDS = 5
+
+# Keywords for the premium taxonomy. tag_questions.CATEGORIES is built from
+# this map, so a category added here is both generated and re-tagged.
+CATEGORY_KEYWORDS = {
+    "Conflict Resolution": ["conflict", "disagree", "disagreed", "disagreement", "disagreements",
+                            "resolve", "resolved", "tension", "pushback", "dispute", "coworker"],
+    "Leadership & Mentorship": ["lead", "led", "leader", "leadership", "mentor", "mentored", "coach",
+                                "delegate", "supervise", "guide", "manage", "motivate others"],
+    "Failure & Learning": ["failed", "failure", "mistake", "learned", "lesson", "setback", "feedback", "regret"],
+    "Delivering Results": ["deadline", "goal", "results", "deliver", "delivered", "achieve",
+                           "productivity", "prioritize", "impact", "metric", "organized"],
+    "Bias for Action": ["quickly", "urgent", "decision", "initiative", "proactive",
+                        "without waiting", "calculated risk"],
+    "Technical Trade-offs": ["trade-off", "tradeoff", "technical", "architecture", "performance",
+                             "scalability", "design", "tools", "technology", "tech debt"],
+    "Ethics & Integrity": ["ethical", "unethical", "ethics", "integrity", "honest", "values", "right thing", "compliance"],
+    "Navigating Ambiguity": ["ambiguity", "ambiguous", "unclear", "uncertain", "change", "changes",
+                             "adapt", "sudden", "priorities"],
+    "Cross-functional Collaboration": ["team", "teamwork", "teammates", "collaborate", "collaboration",
+                                       "cross-functional", "stakeholders", "partner", "cooperate", "group"],
+}
+
+
+def keyword_map(category_keywords):
+    """{category: [keywords]} -> {keyword: category}, the shape set_taxonomy takes."""
+    return {kw: category for category, kws in category_keywords.items() for kw in kws}
+
+
+# --- KEYWORD MATCHER ---
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton: finds every keyword in a text in one pass,
+    however many keywords there are. Matches must sit on word boundaries.
+    """
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for kw in keywords:
+            self._insert(kw.lower())
+        self._build_failure_links()
+
+    def _insert(self, word):
+        node = 0
+        for ch in word:
+            if ch not in self.goto[node]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[node][ch] = len(self.goto) - 1
+            node = self.goto[node][ch]
+        self.output[node].append(word)
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(ch, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find(self, text):
+        """Returns matched keywords in order of appearance (repeats included)."""
+        text = text.lower()
+        found, node = [], 0
+        for i, ch in enumerate(text):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            for word in self.output[node]:
+                start, end = i - len(word) + 1, i + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    found.append(word)
+        return found
+
+
+# --- FEATURES ---
+def hash_matrix(texts, n_features=N_FEATURES):
+    """Hashed, L2-normalized unigram + bigram counts for a batch of texts."""
+    X = np.zeros((len(texts), n_features), dtype=np.float32)
+    for r, text in enumerate(texts):
+        np.add.at(X[r], hash_features(text, n_features), 1.0)
+    X = np.log1p(X)
+    norms = np.linalg.norm(X, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return X / norms
+
+
+def softmax(z):
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+class SoftmaxRegression:
+    """Multinomial logistic regression trained with full-batch gradient descent."""
+
+    def __init__(self, labels):
+        self.labels = list(labels)
+        self.W = None
+        self.b = None
+
+    def fit(self, X, y, weights=None, epochs=EPOCHS, lr=LEARNING_RATE, l2=L2):
+        index = {label: i for i, label in enumerate(self.labels)}
+        Y = np.zeros((len(y), len(self.labels)), dtype=np.float32)
+        Y[np.arange(len(y)), [index[label] for label in y]] = 1.0
+        w = np.ones(len(y), dtype=np.float32) if weights is None else np.asarray(weights, dtype=np.float32)
+        w = (w / w.sum())[:, None]
+        self.W = np.zeros((X.shape[1], len(self.labels)), dtype=np.float32)
+        self.b = np.zeros(len(self.labels), dtype=np.float32)
+        for _ in range(epochs):
+            grad = (softmax(X @ self.W + self.b) - Y) * w
+            self.W -= lr * (X.T @ grad + l2 * self.W)
+            self.b -= lr * grad.sum(axis=0)
+        return self
+
+    def predict_proba(self, X):
+        return softmax(X @ self.W + self.b)
+
+
+# --- TAGGER ---
+class Tagger:
+    """
+    Assigns category and keywords to questions with no API calls. Trained
+    on the seeded rows; everything runs as batched matrix products.
+
+    Difficulty is not predicted: the seed difficulties were drawn at random
+    (tag_questions.py), so a classifier scores no better than the majority
+    class. Rows without one are left unrated.
+    """
+
+    def fit(self, records):
+        self.records = records
+        self.category_model = self._fit_model(records, "category", sorted({r["category"] for r in records}))
+
+        # Keyword -> category votes, learned from the seed labels
+        votes = defaultdict(Counter)
+        for r in records:
+            for kw in r.get("keywords") or []:
+                votes[kw.lower()][r["category"]] += 1
+        self.set_taxonomy({kw: c.most_common(1)[0][0] for kw, c in votes.items()})
+        return self
+
+    @staticmethod
+    def _fit_model(records, field, labels):
+        # Templated rows repeat a lot: train once per distinct (text, label) with a weight
+        pairs = Counter((r["question"], r[field]) for r in records if r.get(field) in labels)
+        model = SoftmaxRegression(labels)
+        model.fit(hash_matrix([text for text, _ in pairs]), [label for _, label in pairs], list(pairs.values()))
+        return model
+
+    def set_taxonomy(self, keyword_to_category):
+        """
+        Swaps the keyword -> category map. If it introduces categories the
+        classifier doesn't know (e.g. a new tag_questions.CATEGORIES), the
+        seed rows are relabeled by keyword votes and the classifier refit.
+        """
+        self.keyword_to_category = {kw.lower(): cat for kw, cat in keyword_to_category.items()}
+        self.matcher = KeywordMatcher(self.keyword_to_category)
+        self.categories = categories = set(self.keyword_to_category.values())
+        if categories - set(self.category_model.labels):
+            relabeled = []
+            for r in self.records:
+                votes = Counter(self.keyword_to_category[kw] for kw in self.matcher.find(" ".join([r["question"]] + list(r.get("keywords") or []))))
+                if votes:
+                    relabeled.append({**r, "category": votes.most_common(1)[0][0]})
+            if relabeled:
+                self.category_model = self._fit_model(relabeled, "category", sorted({r["category"] for r in relabeled}))
+
+    def tag(self, texts):
+        """Returns one {"category", "keywords"} dict per text."""
+        X = hash_matrix(texts)
+        probs = self.category_model.predict_proba(X)
+        # Taxonomy categories the classifier has no rows for can still win on keywords
+        extra = sorted(set(self.keyword_to_category.values()) - set(self.category_model.labels))
+        labels = self.category_model.labels + extra
+        cat_scores = np.hstack([probs, np.zeros((len(texts), len(extra)), dtype=probs.dtype)])
+
+        # Keyword hits nudge the classifier toward the categories they point at
+        col = {label: i for i, label in enumerate(labels)}
+        hits = np.zeros_like(cat_scores)
+        matched = []
+        for r, text in enumerate(texts):
+            found = self.matcher.find(text or "")
+            matched.append([kw for kw, _ in Counter(found).most_common(MAX_KEYWORDS)])
+            for kw in found:
+                c = col.get(self.keyword_to_category[kw])
+                if c is not None:
+                    hits[r, c] += 1
+        totals = hits.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1.0
+        cat_scores = cat_scores + KEYWORD_WEIGHT * hits / totals
+
+        categories = cat_scores.argmax(axis=1)
+        return [{"category": labels[c], "keywords": kws} for c, kws in zip(categories, matched)]
+
+    def tag_records(self, records):
+        """
+        Fills gaps in place on question dicts: a category outside the current
+        taxonomy is re-tagged and a missing keyword list is filled. Existing
+        valid labels are kept; they beat the classifier. Difficulty is never
+        touched.
+        """
+        changed = 0
+        for record, tags in zip(records, self.tag([r.get("question", "") for r in records])):
+            before = dict(record)
+            if record.get("category") not in self.categories:
+                record["category"] = tags["category"]
+            if not record.get("keywords"):
+                record["keywords"] = tags["keywords"]
+            changed += record != before
+        return changed
+
+
+def load_tagger(seed_file=SEED_FILE, taxonomy=CATEGORY_KEYWORDS):
+    from core.dataset import read_records, prefer_columnar
+    tagger = Tagger().fit(read_records(prefer_columnar(seed_file), columns=["question", "category", "keywords"]))
+    if taxonomy:
+        tagger.set_taxonomy(keyword_map(taxonomy))
+    return tagger
+
+
+# --- EVALUATION ---
+def evaluate(records, folds=EVAL_FOLDS):
+    """
+    Grouped k-fold category accuracy: every copy of a question lands in the
+    same fold, so the classifier is always scored on questions it never saw.
+    Returns {"category": (accuracy, majority-class baseline)}.
+    """
+    questions = sorted({r["question"] for r in records})
+    order = np.random.default_rng(0).permutation(len(questions))
+    fold_of = {questions[i]: k % folds for k, i in enumerate(order)}
+    hits, base, n = 0, 0, 0
+    for k in range(folds):
+        train = [r for r in records if fold_of[r["question"]] != k]
+        test = [r for r in records if fold_of[r["question"]] == k]
+        tags = Tagger().fit(train).tag([r["question"] for r in test])
+        majority = Counter(r["category"] for r in train).most_common(1)[0][0]
+        hits += sum(t["category"] == r["category"] for t, r in zip(tags, test))
+        base += sum(r["category"] == majority for r in test)
+        n += len(test)
+    return {"category": (hits / n, base / n)}
+
+
+# --- CLI ---
+USAGE = """Usage:
+  python -m core.tagger evaluate                  held-out accuracy on the seed set
+  python -m core.tagger retag <input> <output>    fill / re-tag labels outside the current taxonomy"""
+
+
+def main(argv):
+    from core.dataset import read_records, write_dataset, prefer_columnar
+    import time
+
+    if argv == ["evaluate"]:
+        records = read_records(prefer_columnar(SEED_FILE), columns=["question", "category", "keywords"])
+        print(f"📏 {len(records)} rows, {len({r['question'] for r in records})} distinct questions, "
+              f"{EVAL_FOLDS} folds grouped by question")
+        for field, (acc, baseline) in evaluate(records).items():
+            print(f"   {field:<10} accuracy {acc:.2f}  (majority baseline {baseline:.2f})")
+        return 0
+    if len(argv) == 3 and argv[0] == "retag":
+        if argv[1] == argv[2]:
+            print("❌ Write to a new file and review it before replacing the original.")
+            return 1
+        start = time.time()
+        records = read_records(argv[1])
+        changed = load_tagger().tag_records(records)
+        write_dataset(records, argv[2])
+        print(f"✅ Filled labels on {changed}/{len(records)} questions in {time.time() - start:.1f}s -> {argv[2]}")
+        return 0
+    print(USAGE)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
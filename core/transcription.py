@@ -0,0 +1,128 @@
+import io
+import wave
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+# --- CONFIGURATION ---
+WHISPER_MODEL = "whisper-large-v3"
+CHUNK_SECONDS = 30      # Target chunk length
+SEARCH_SECONDS = 5      # How far either side of the target to look for silence
+WINDOW_MS = 30          # Energy window used to find silence
+MAX_WORKERS = 4
+
+
+# --- SPLITTING ---
+def read_wav(audio_bytes):
+    """Returns (samples as int16 mono array, params) or None if it isn't a PCM WAV."""
+    try:
+        with wave.open(io.BytesIO(audio_bytes), "rb") as wf:
+            params = wf.getparams()
+            frames = wf.readframes(params.nframes)
+    except (wave.Error, EOFError):
+        return None
+    if params.sampwidth != 2:
+        return None
+    samples = np.frombuffer(frames, dtype=np.int16)
+    if params.nchannels > 1:
+        samples = samples.reshape(-1, params.nchannels).mean(axis=1).astype(np.int16)
+    return samples, params
+
+
+def find_split_points(samples, framerate, chunk_seconds=CHUNK_SECONDS, search_seconds=SEARCH_SECONDS):
+    """
+    Picks cut points near every chunk_seconds, snapped to the quietest
+    window within +/- search_seconds so we cut between words.
+    """
+    window = max(1, int(framerate * WINDOW_MS / 1000))
+    n_windows = len(samples) // window
+    if n_windows == 0:
+        return []
+    # RMS energy per window, vectorized
+    frames = samples[: n_windows * window].astype(np.float32).reshape(n_windows, window)
+    energy = np.sqrt((frames ** 2).mean(axis=1))
+
+    per_chunk = int(chunk_seconds * 1000 / WINDOW_MS)
+    search = int(search_seconds * 1000 / WINDOW_MS)
+    cuts = []
+    target = per_chunk
+    while target + search < n_windows:
+        lo, hi = target - search, target + search
+        best = lo + int(np.argmin(energy[lo:hi]))
+        cuts.append(best * window)
+        target = best + per_chunk
+    return cuts
+
+
+def split_audio(audio_bytes, chunk_seconds=CHUNK_SECONDS):
+    """
+    Splits a WAV recording at silence into back-to-back WAV chunks. Cuts
+    land exactly on the quiet window with no overlap: padding them would
+    put the chunk edges mid-word, and Whisper transcribes a clipped word
+    differently in each chunk, so the duplicate can't be matched away.
+    Returns a list of WAV byte strings (a single item if it can't/needn't split).
+    """
+    decoded = read_wav(audio_bytes)
+    if decoded is None:
+        return [audio_bytes]
+    samples, params = decoded
+    if len(samples) < params.framerate * chunk_seconds * 1.5:
+        return [audio_bytes]
+
+    cuts = find_split_points(samples, params.framerate, chunk_seconds)
+    bounds = [0] + cuts + [len(samples)]
+    chunks = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        chunk = samples[start:end]
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(params.framerate)
+            wf.writeframes(chunk.tobytes())
+        chunks.append(buf.getvalue())
+    return chunks
+
+
+# --- STITCHING ---
+def stitch_texts(left, right):
+    """
+    Joins two chunk transcripts. Chunks don't overlap, so nothing is
+    deduplicated (which would also eat genuine repeats like "I think I think").
+    """
+    return " ".join(left.split() + right.split())
+
+
+# --- TRANSCRIPTION ---
+def transcribe_chunk(chunk_bytes, groq_client, model=WHISPER_MODEL):
+    return groq_client.audio.transcriptions.create(file=("answer.wav", chunk_bytes), model=model).text
+
+
+def transcribe_stream(audio_bytes, groq_client, model=WHISPER_MODEL, max_workers=MAX_WORKERS):
+    """
+    Transcribes chunks concurrently. Yields (chunks_done, total_chunks, text)
+    every time the in-order prefix of finished chunks grows; the last
+    yield is the full stitched transcript.
+    """
+    chunks = split_audio(audio_bytes)
+    texts = [None] * len(chunks)
+    stitched, next_idx = "", 0
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+        futures = {pool.submit(transcribe_chunk, c, groq_client, model): i for i, c in enumerate(chunks)}
+        for future in as_completed(futures):
+            texts[futures[future]] = future.result()
+            grew = False
+            while next_idx < len(chunks) and texts[next_idx] is not None:
+                stitched = stitch_texts(stitched, texts[next_idx])
+                next_idx += 1
+                grew = True
+            if grew:
+                yield next_idx, len(chunks), stitched
+
+
+def transcribe_audio(audio_bytes, groq_client, model=WHISPER_MODEL):
+    """Blocking wrapper. Returns the full transcript."""
+    text = ""
+    for _, _, text in transcribe_stream(audio_bytes, groq_client, model):
+        pass
+    return text
@@ -0,0 +1,15 @@
+-- Per-user progress aggregates (core/analytics.py) and the submission
+-- owner they are keyed by. Safe to run more than once.
+
+create table if not exists submission_stats (
+    key text primary key,       -- "user|dimension|value"
+    user_id text not null,
+    stats jsonb not null,
+    updated_at timestamptz default now()
+);
+create index if not exists submission_stats_user_id_idx on submission_stats (user_id);
+
+-- Submissions carry the user they belong to, so a backfill rebuilds the
+-- same per-user slices that live record() calls maintain
+alter table submissions add column if not exists user_id text default 'anonymous';
+create index if not exists submissions_user_id_created_at_idx on submissions (user_id, created_at desc);
@@ -0,0 +1,31 @@
+-- Atomic increment for core/analytics.py: live submissions add to their
+-- slices inside the database, so concurrent app processes and a rebuild by
+-- `python -m core.analytics backfill` never overwrite each other's counts.
+
+create or replace function bump_submission_stats(p_user_id text, p_keys text[], p_score int, p_verdict text)
+returns void
+language plpgsql
+as $$
+declare
+    k text;
+begin
+    foreach k in array p_keys loop
+        insert into submission_stats (key, user_id, stats)
+        values (k, p_user_id, '{"count": 0, "total": 0, "hist": {}, "verdicts": {}}'::jsonb)
+        on conflict (key) do nothing;
+
+        -- The row lock taken by this update serializes concurrent bumps
+        update submission_stats
+        set stats = jsonb_build_object(
+                'count', coalesce((stats->>'count')::int, 0) + 1,
+                'total', coalesce((stats->>'total')::int, 0) + p_score,
+                'hist', coalesce(stats->'hist', '{}'::jsonb)
+                        || jsonb_build_object(p_score::text, coalesce((stats->'hist'->>p_score::text)::int, 0) + 1),
+                'verdicts', coalesce(stats->'verdicts', '{}'::jsonb)
+                        || jsonb_build_object(p_verdict, coalesce((stats->'verdicts'->>p_verdict)::int, 0) + 1)
+            ),
+            updated_at = now()
+        where key = k;
+    end loop;
+end;
+$$;
@@ -0,0 +1,243 @@
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from groq import Groq
+from supabase import create_client
+
+from core.grading import MODEL_LADDER, grade_answer, format_feedback
+
+# --- CONFIGURATION ---
+CHECKPOINT_FILE = "regrade_checkpoint.json"
+RESULTS_FILE = "regrade_results.csv"   # One line per re-graded submission (old vs new)
+DRY_RUN_CHECKPOINT_FILE = "regrade_dry_run_checkpoint.json"  # Dry runs never move the real checkpoint
+DRY_RUN_RESULTS_FILE = "regrade_dry_run_results.csv"
+PAGE_SIZE = 200
+CONCURRENCY = 8
+REQUESTS_PER_MINUTE = 240             # Stay under the Groq account limit
+MAX_ATTEMPTS = 3
+
+RESULT_FIELDS = ["id", "question_id", "old_score", "new_score", "old_verdict", "new_verdict", "model"]
+
+
+class RateLimiter:
+    """Token bucket shared by all worker threads."""
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimitedClient:
+    """Wraps the Groq client so every completion call takes a token first."""
+
+    def __init__(self, client, limiter):
+        self.client = client
+        self.limiter = limiter
+        self.chat = self
+        self.completions = self
+
+    def create(self, **kwargs):
+        self.limiter.acquire()
+        return self.client.chat.completions.create(**kwargs)
+
+
+# --- CHECKPOINT ---
+def load_checkpoint(path=CHECKPOINT_FILE):
+    # failed_ids: submissions the checkpoint moved past without a grade; retried at the end of every run
+    state = {"last_id": 0, "done": 0, "failed_ids": [], "skipped": 0}
+    if os.path.exists(path):
+        with open(path) as f:
+            state.update(json.load(f))
+    return state
+
+
+def save_checkpoint(state, path=CHECKPOINT_FILE):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+# --- GRADING ---
+def regrade_one(row, question, groq_client, models):
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            return grade_answer(row.get("transcript") or "", question.get("ideal_answer", ""),
+                                question.get("question", ""), groq_client, models=models)
+        except Exception as e:
+            if attempt == MAX_ATTEMPTS - 1:
+                print(f"   ❌ Submission {row['id']}: {e}")
+                return None
+            time.sleep(2 ** attempt)
+
+
+def fetch_questions(supabase, ids, cache):
+    missing = [i for i in set(ids) if i not in cache]
+    if missing:
+        for q in supabase.table("questions").select("id, question, ideal_answer").in_("id", missing).execute().data:
+            cache[q["id"]] = q
+    return cache
+
+
+# --- DRIFT REPORT ---
+def drift_report(path=RESULTS_FILE):
+    if not os.path.exists(path):
+        print(f"No results file at {path}; run a re-grade first.")
+        return
+    with open(path) as f:
+        rows = list(csv.DictReader(f))
+    if not rows:
+        print("No re-graded submissions to report on.")
+        return
+    deltas = [int(r["new_score"]) - int(float(r["old_score"] or 0)) for r in rows]
+    n = len(deltas)
+    changed = sum(1 for r in rows if r["old_verdict"] != r["new_verdict"])
+    transitions = Counter((r["old_verdict"] or "None", r["new_verdict"]) for r in rows if r["old_verdict"] != r["new_verdict"])
+    buckets = Counter(min(max(d // 10 * 10, -50), 50) for d in deltas)
+
+    print("\n📊 SCORE DRIFT REPORT")
+    print(f"   Submissions re-graded : {n}")
+    print(f"   Mean delta (new-old)  : {sum(deltas) / n:+.1f}")
+    print(f"   Mean |delta|          : {sum(abs(d) for d in deltas) / n:.1f}")
+    print(f"   Verdict changed       : {changed} ({changed / n:.0%})")
+    print("   Delta histogram:")
+    for bucket in sorted(buckets):
+        print(f"     {bucket:+4d}..{bucket + 9:+4d} {'█' * max(1, buckets[bucket] * 40 // n)} {buckets[bucket]}")
+    if transitions:
+        print("   Top verdict changes:")
+        for (old, new), count in transitions.most_common(8):
+            print(f"     {old:>12} -> {new:<12} {count}")
+
+
+# --- MAIN EXECUTION ---
+def main():
+    parser = argparse.ArgumentParser(description="Re-grade stored submission transcripts with the current grader.")
+    parser.add_argument("--dry-run", action="store_true", help="Grade and report drift without updating submissions")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many submissions")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--rpm", type=int, default=REQUESTS_PER_MINUTE, help="Max grading requests per minute")
+    parser.add_argument("--models", default=",".join(MODEL_LADDER), help="Comma-separated model ladder")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first submission")
+    parser.add_argument("--report-only", action="store_true", help="Just print the drift report for the last run")
+    args = parser.parse_args()
+
+    checkpoint_file, results_path = CHECKPOINT_FILE, RESULTS_FILE
+    if args.dry_run:
+        checkpoint_file, results_path = DRY_RUN_CHECKPOINT_FILE, DRY_RUN_RESULTS_FILE
+
+    if args.report_only:
+        drift_report(results_path)
+        return
+
+    supabase = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+    groq_client = RateLimitedClient(Groq(api_key=os.environ["GROQ_API_KEY"]), RateLimiter(args.rpm))
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+
+    if args.restart:
+        for path in [checkpoint_file, results_path]:
+            if os.path.exists(path):
+                os.remove(path)
+    state = load_checkpoint(checkpoint_file)
+    state.pop("failed", None)  # Older checkpoints only counted failures
+    if state["last_id"]:
+        print(f"🔄 Checkpoint found. Resuming after submission {state['last_id']} ({state['done']} done, "
+              f"{len(state['failed_ids'])} to retry)...")
+
+    new_file = not os.path.exists(results_path)
+    questions = {}
+    processed = 0
+    with open(results_path, "a", newline="") as results_file, ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        writer = csv.DictWriter(results_file, fieldnames=RESULT_FIELDS)
+        if new_file:
+            writer.writeheader()
+
+        def regrade_rows(rows):
+            """Grades one batch, writes it in one bulk upsert and records which ids failed."""
+            fetch_questions(supabase, [r["question_id"] for r in rows], questions)
+            # A deleted question leaves nothing to grade against; keep the stored score
+            gradable = [r for r in rows if r["question_id"] in questions]
+            state["skipped"] += len(rows) - len(gradable)
+            grades = list(pool.map(lambda r: regrade_one(r, questions[r["question_id"]], groq_client, models), gradable))
+
+            failed = set(state["failed_ids"]) - {r["id"] for r in rows}
+            updates = []
+            for row, grade in zip(gradable, grades):
+                if grade is None:
+                    failed.add(row["id"])
+                    continue
+                writer.writerow({"id": row["id"], "question_id": row["question_id"],
+                                 "old_score": row.get("ai_score"), "new_score": grade["score"],
+                                 "old_verdict": row.get("ai_verdict"), "new_verdict": grade["verdict"],
+                                 "model": grade.get("model") or "local"})
+                updates.append({"id": row["id"], "question_id": row["question_id"], "transcript": row.get("transcript"),
+                                "ai_score": grade["score"], "ai_verdict": grade["verdict"],
+                                "ai_feedback": format_feedback(grade)})
+
+            if updates and not args.dry_run:
+                supabase.table("submissions").upsert(updates).execute()
+            results_file.flush()
+            state["failed_ids"] = sorted(failed)
+            state["done"] += len(updates)
+
+        while args.limit is None or processed < args.limit:
+            # Keyset pagination: stable and index-backed however far in we are
+            page_size = PAGE_SIZE if args.limit is None else min(PAGE_SIZE, args.limit - processed)
+            rows = (supabase.table("submissions").select("id, question_id, transcript, ai_score, ai_verdict")
+                    .gt("id", state["last_id"]).order("id").limit(page_size).execute().data)
+            if not rows:
+                break
+
+            # One bulk write per page, then move the checkpoint past it (failures stay in failed_ids)
+            regrade_rows(rows)
+            state["last_id"] = rows[-1]["id"]
+            save_checkpoint(state, checkpoint_file)
+            processed += len(rows)
+            print(f"✅ Page done: {state['done']} re-graded, {len(state['failed_ids'])} failed, "
+                  f"{state['skipped']} skipped (last id {state['last_id']})")
+
+        # One more pass over everything that failed, in this run or an earlier one
+        retry = list(state["failed_ids"])
+        if retry:
+            print(f"🔁 Retrying {len(retry)} failed submissions...")
+        for start in range(0, len(retry), PAGE_SIZE):
+            batch = retry[start:start + PAGE_SIZE]
+            rows = (supabase.table("submissions").select("id, question_id, transcript, ai_score, ai_verdict")
+                    .in_("id", batch).order("id").execute().data)
+            # Rows deleted since they failed have nothing left to retry
+            state["failed_ids"] = sorted(set(state["failed_ids"]) - set(batch) | {r["id"] for r in rows})
+            if rows:
+                regrade_rows(rows)
+            save_checkpoint(state, checkpoint_file)
+
+    print(f"\n🎉 Re-grading complete! {state['done']} {'graded (dry run)' if args.dry_run else 'updated'}, "
+          f"{len(state['failed_ids'])} failed, {state['skipped']} skipped (question missing).")
+    if state["failed_ids"]:
+        print(f"   Still failing (retried on the next run): {state['failed_ids'][:20]}")
+    drift_report(results_path)
+    if not args.dry_run:
+        print("\nℹ️ Scores changed: run `python -m core.analytics backfill` to rebuild the progress aggregates.")
+
+
+if __name__ == "__main__":
+    main()
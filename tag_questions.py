@@ -4,11 +4,15 @@ import time
 import random
 import os
 from groq import Groq
+from core.dataset import read_dataset, write_dataset
+from core.tagger import CATEGORY_KEYWORDS
 
 # --- CONFIGURATION ---
-OUTPUT_FILE = "bleet_premium_dataset.json"
-CHECKPOINT_FILE = "bleet_gen_checkpoint.json"
-GROQ_API_KEY = "st.secrets["GROQ_API_KEY"]" # <--- PASTE KEY HERE
+OUTPUT_FILE = "bleet_premium_dataset.parquet"
+EXPORT_FILE = "bleet_premium_dataset.json"      # JSON export for anything that still wants it
+CHECKPOINT_FILE = "bleet_gen_checkpoint.parquet"
+LEGACY_CHECKPOINT_FILE = "bleet_gen_checkpoint.json"
+GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "") # <--- OR PASTE KEY HERE
 
 # User requested Qwen model.
 # Note: If this specific ID is unavailable, swap to 'llama-3.3-70b-versatile'
@@ -30,11 +34,8 @@ EXPERIENCE_LEVELS = [
     "Managerial"
 ]
 
-CATEGORIES = [
-    "Conflict Resolution", "Leadership & Mentorship", "Failure & Learning",
-    "Delivering Results", "Bias for Action", "Technical Trade-offs",
-    "Ethics & Integrity", "Navigating Ambiguity", "Cross-functional Collaboration"
-]
+# Categories live with their keywords so the local tagger re-tags against the same list
+CATEGORIES = list(CATEGORY_KEYWORDS)
 
 DIFFICULTIES = ["Medium", "Hard", "Expert"] # Skipping "Easy" for premium feel
 
@@ -113,18 +114,20 @@ def generate_content_for_batch(batch_df):
 # --- MAIN EXECUTION ---
 def main():
     # 1. Check for Checkpoint
-    if os.path.exists(CHECKPOINT_FILE):
-        print(f"🔄 Checkpoint found. Resuming...")
+    # Older runs checkpointed to JSON; pick those up too
+    checkpoint = next((p for p in [CHECKPOINT_FILE, LEGACY_CHECKPOINT_FILE] if os.path.exists(p)), None)
+    if checkpoint:
+        print(f"🔄 Checkpoint found ({checkpoint}). Resuming...")
         try:
-            df = pd.read_json(CHECKPOINT_FILE)
-        except ValueError:
+            df = read_dataset(checkpoint)
+        except (ValueError, OSError):
             print("⚠️ Checkpoint file is empty or corrupted. Starting fresh.")
             df = generate_blueprint(5000)
     else:
         # Start fresh
         df = generate_blueprint(5000)
         # Save immediately
-        df.to_json(CHECKPOINT_FILE, orient='records', indent=2)
+        write_dataset(df, CHECKPOINT_FILE)
 
     # 2. Identify rows that need generation
     # We look for rows where 'question' is still None
@@ -150,15 +153,16 @@ def main():
             print("⚠️ Batch failed or mismatch. Skipping (will retry next run).")
             time.sleep(2) # Penalty wait
         
-        # Save Progress
-        df.to_json(CHECKPOINT_FILE, orient='records', indent=2)
+        # Save Progress (Parquet: small, fast, and written atomically)
+        write_dataset(df, CHECKPOINT_FILE)
         
         # Rate Limit Protection
         # We are generating A LOT of text, so we need a healthy sleep
         time.sleep(2) 
 
     print(f"\n🎉 Generation Complete! Saving to {OUTPUT_FILE}")
-    df.to_json(OUTPUT_FILE, orient='records', indent=2)
+    write_dataset(df, OUTPUT_FILE)
+    write_dataset(df, EXPORT_FILE)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
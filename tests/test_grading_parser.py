@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from core.grading import FeedbackStreamParser, is_retryable
+
+GRADE = {"score": 72, "verdict": "Pass", "confidence": 0.8,
+         "feedback": 'Said "we" a lot\n\tnaïve / \U0001F600 \\u0041', "done": True}
+
+
+def feed_in_chunks(text, size):
+    parser = FeedbackStreamParser()
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+    return parser
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 1000])
+def test_escapes_split_across_chunks(size):
+    text = json.dumps(GRADE)  # ASCII-escaped: é and the surrogate pair for the emoji
+    parser = feed_in_chunks(text, size)
+    assert parser.complete
+    assert parser.fields == GRADE
+
+
+def test_feedback_streams_before_the_string_closes():
+    parser = FeedbackStreamParser()
+    parser.feed('{"score": 40, "feedback": "Use the ST')
+    assert parser.fields == {"score": 40, "feedback": "Use the ST"}
+    assert parser.feed('AR method"') == {"feedback"}
+    assert parser.fields["feedback"] == "Use the STAR method"
+
+
+def test_fenced_output_with_preamble():
+    text = 'Here is the grade:\n```json\n' + json.dumps(GRADE, indent=2) + '\n```\n'
+    parser = feed_in_chunks(text, 4)
+    assert parser.complete
+    assert parser.fields == GRADE
+
+
+def test_truncated_object_is_not_complete():
+    text = json.dumps(GRADE)
+    parser = feed_in_chunks(text[: len(text) // 2], 3)
+    assert not parser.complete
+    assert parser.fields["score"] == 72
+
+
+def test_truncated_scalar_is_not_published():
+    parser = FeedbackStreamParser()
+    parser.feed('{"score": 7')
+    assert "score" not in parser.fields
+    assert not parser.complete
+
+
+@pytest.mark.parametrize("text", [
+    '{"score": 72 "verdict": "Pass"}',   # Missing comma
+    '{"score": 7x2}',                     # Bad scalar
+    '{"feedback": "bad \\q escape"}',
+    '{"nested": {"a": 1}}',
+    '{"score" 72}',                       # Missing colon
+    '{72: "score"}',                      # Unquoted key
+])
+def test_invalid_objects_raise(text):
+    with pytest.raises(ValueError):
+        FeedbackStreamParser().feed(text)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+@pytest.mark.parametrize("status, expected", [
+    (None, True), (408, True), (429, True), (500, True), (503, True),
+    (400, False), (401, False), (404, False), (422, False),
+])
+def test_is_retryable(status, expected):
+    assert is_retryable(StatusError(status) if status else ConnectionError()) is expected
@@ -1,13 +1,106 @@
+import logging
+
 import streamlit as st
+import streamlit.components.v1 as components
 import streamlit_shadcn_ui as ui
 
-def show_login_page(supabase_client):
+from core.session import SessionStore, SESSION_COOKIE, LOGIN_PARAM, SESSION_MAX_AGE
+
+DEFAULT_REDIRECT_URL = "http://localhost:8501"
+
+logger = logging.getLogger(__name__)
+
+
+@st.cache_data
+def load_stylesheet(path="assets/style.css"):
+    with open(path) as f:
+        return f.read()
+
+
+@st.cache_resource
+def get_session_store():
+    """The login store, or None when SESSION_SECRET isn't set (sign-in disabled, app runs signed out)."""
+    secret = st.secrets.get("SESSION_SECRET")
+    if not secret:
+        logger.info("SESSION_SECRET not set: sign-in is disabled.")
+        return None
+    store = SessionStore(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"], secret)
+    store.start_refresher()
+    return store
+
+
+def auth_enabled():
+    return get_session_store() is not None
+
+
+def get_oauth_url(provider="github"):
+    """One login URL (and PKCE verifier) per browser session, reused across reruns."""
+    key = f"oauth_url_{provider}"
+    if key not in st.session_state:
+        redirect_to = st.secrets.get("AUTH_REDIRECT_URL", DEFAULT_REDIRECT_URL)
+        st.session_state[key] = get_session_store().authorize_url(provider, redirect_to)
+    return st.session_state[key]
+
+
+def _set_session_cookie(value, max_age):
+    # Streamlit has no server-side Set-Cookie, so the browser sets it. The id
+    # is HMAC-signed but, unlike an HttpOnly cookie, readable by page scripts.
+    secure = " + (parent.location.protocol === 'https:' ? '; Secure' : '')"
+    components.html(f"<script>parent.document.cookie = '{SESSION_COOKIE}={value}; Max-Age={max_age}; Path=/; SameSite=Lax'{secure};</script>", height=0)
+
+
+def restore_session():
+    """
+    Returns the signed-in user's session (or None) and sets
+    st.session_state.user_id. Finishes the OAuth redirect the first time;
+    after that it is a local lookup, token refreshes happen in the background.
+    """
+    if st.session_state.get("auth_session"):
+        return st.session_state.auth_session
+
+    store = get_session_store()
+    if store is None:
+        return None
+    session = None
+    if "code" in st.query_params and LOGIN_PARAM in st.query_params:
+        # Back from GitHub: trade the one-time code for tokens and keep them server-side
+        try:
+            signed_sid = store.finish_login(st.query_params[LOGIN_PARAM], st.query_params["code"])
+            _set_session_cookie(signed_sid, SESSION_MAX_AGE)
+            st.session_state.signed_sid = signed_sid
+            session = store.get(signed_sid)
+        except Exception as e:
+            st.error(f"Login failed: {e}")
+        st.query_params.clear()
+        st.session_state.show_login = False
+    elif st.context.cookies.get(SESSION_COOKIE):
+        session = store.get(st.context.cookies[SESSION_COOKIE])
+        if session is None:
+            _set_session_cookie("", 0)  # Expired, revoked or tampered with
+        else:
+            st.session_state.signed_sid = st.context.cookies[SESSION_COOKIE]
+
+    if session:
+        st.session_state.auth_session = session
+        st.session_state.user_id = session["user_id"]
+    return session
+
+
+def logout():
+    store = get_session_store()
+    if store is not None and st.session_state.get("signed_sid"):
+        store.delete(st.session_state.signed_sid)
+    _set_session_cookie("", 0)
+    for key in ["auth_session", "user_id", "signed_sid"]:
+        st.session_state.pop(key, None)
+
+
+def show_login_page():
     """
     Renders a professional Login Card centered on the screen.
     """
     # Load custom CSS
-    with open("assets/style.css") as f:
-        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+    st.markdown(f"<style>{load_stylesheet()}</style>", unsafe_allow_html=True)
 
     # Center the login card using columns
     col1, col2, col3 = st.columns([1, 1.5, 1])
@@ -19,14 +112,7 @@ def show_login_page(supabase_client):
         st.write("") # Spacer
         
         # GitHub Login Button (Styled exactly like Auth0)
-        # NEW WORKING CODE
-        response = supabase_client.auth.sign_in_with_oauth({
-            "provider": "github",
-            "options": {
-                "redirect_to": "http://localhost:8501"
-            }
-        })
-        auth_url = response.url
+        auth_url = get_oauth_url()
         
         # Custom HTML Button
         st.markdown(f'''
@@ -71,4 +157,9 @@ def show_login_page(supabase_client):
                 </svg>
                 Continue with Google (Coming Soon)
             </div>
-        ''', unsafe_allow_html=True)
\ No newline at end of file
+        ''', unsafe_allow_html=True)
+
+        st.write("") # Spacer
+        if st.button("Continue without signing in", use_container_width=True):
+            st.session_state.show_login = False
+            st.rerun()
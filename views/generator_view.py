@@ -2,6 +2,8 @@ import streamlit as st
 import PyPDF2
 import json
 import random
+from core.context import pack_context
+from views.resources import get_question_index, get_prefetcher, get_tagger, open_question
 
 def extract_text_from_pdf(uploaded_file):
     reader = PyPDF2.PdfReader(uploaded_file)
@@ -11,10 +13,11 @@ def extract_text_from_pdf(uploaded_file):
     return text
 
 def generate_custom_questions(resume_text, jd_text, groq_client):
+    resume_context, jd_context = pack_context(resume_text, jd_text)
     prompt = f"""
     You are a Bar Raiser at a top tech company. 
-    JOB DESCRIPTION: {jd_text[:2000]}
-    RESUME: {resume_text[:2000]}
+    JOB DESCRIPTION: {jd_context}
+    RESUME: {resume_context}
     TASK: Generate exactly 10 PURELY BEHAVIORAL interview questions.
     CRITICAL RULES:
     1. NO TECHNICAL "HOW-TO". Focus on conflict, failure, leadership.
@@ -59,12 +62,19 @@ def view_custom_generator(supabase, groq_client):
             generated_batch = generate_custom_questions(resume_text, jd_text, groq_client)
             
             if generated_batch:
-                for q in generated_batch:
+                tags = get_tagger().tag([q.get('question', '') for q in generated_batch])
+                for q, t in zip(generated_batch, tags):
                     q['source_type'] = "User Generated"
+                    # The LLM's labels win; the local tagger only fills what it left out
+                    q['category'] = q.get('category') or t['category']
                 
                 try:
-                    data, count = supabase.table("questions").insert(generated_batch).execute()
-                    st.session_state.generated_questions = generated_batch
+                    response = supabase.table("questions").insert(generated_batch).execute()
+                    # Make the new questions recommendable right away
+                    get_question_index(supabase).add(response.data)
+                    # Full rows go to the shared cache; the session only keeps ids + titles
+                    get_prefetcher(supabase).put(response.data)
+                    st.session_state.generated_questions = [{"id": q["id"], "question": q["question"]} for q in response.data]
                     st.success(f"🎉 Success! Generated {len(generated_batch)} behavioral scenarios.")
                 except Exception as db_err:
                     st.error(f"Database Error: {db_err}")
@@ -77,8 +87,6 @@ def view_custom_generator(supabase, groq_client):
         for i, q in enumerate(st.session_state.generated_questions):
             with st.container():
                 st.markdown(f"**Question {i+1}:** {q['question']}")
-                if st.button(f"Practice Question {i+1} ➡️", key=f"btn_{i}"):
-                    db_row = supabase.table("questions").select("*").eq("question", q['question']).limit(1).single().execute()
-                    st.session_state.selected_question = db_row.data
+                if st.button(f"Practice Question {i+1} ➡️", key=f"btn_{i}") and open_question(supabase, q['id']):
                     st.rerun()
                 st.divider()
\ No newline at end of file
@@ -1,29 +1,29 @@
+import logging
 import streamlit as st
-import pandas as pd
 import datetime
-import re
 import math
 from streamlit_mic_recorder import mic_recorder
+from core.transcription import transcribe_stream
+from core.grading import grade_answer_stream
+from views.resources import (get_question_index, get_prefetcher, get_analytics, current_user_id, get_catalog,
+                             fetch_score_history, open_question)
+
+logger = logging.getLogger(__name__)
 
 # --- Helper Functions ---
 def get_ai_feedback(user_transcript, ideal_answer, question_text, groq_client):
-    prompt = f"""
-    Role: Senior Recruiter. Question: "{question_text}" Candidate Answer: "{user_transcript}"
-    Task: Grade based on Relevance, STAR Structure, and Clarity. (Ref Strategy: "{ideal_answer}")
-    OUTPUT: Score: [0-100], Verdict: [Strong Hire/Hire/No Hire], Feedback: [Advice]
-    """
-    completion = groq_client.chat.completions.create(
-        model="llama-3.3-70b-versatile", messages=[{"role": "user", "content": prompt}]
-    )
-    return completion.choices[0].message.content
-
-def parse_feedback(feedback_text):
-    score = 0; verdict = "Pending"
-    score_match = re.search(r"Score:\s*(\d+)", feedback_text, re.IGNORECASE)
-    if score_match: score = int(score_match.group(1))
-    verdict_match = re.search(r"Verdict:\s*(.+)", feedback_text, re.IGNORECASE)
-    if verdict_match: verdict = verdict_match.group(1).strip()
-    return score, verdict, feedback_text
+    # Stream the grade: score/verdict appear first, feedback renders as it's generated
+    score_slot = st.empty()
+    feedback_slot = st.empty()
+
+    result = None
+    for state in grade_answer_stream(user_transcript, ideal_answer, question_text, groq_client):
+        score = state["score"] if state["score"] is not None else "..."
+        verdict = state["verdict"] or "..."
+        score_slot.markdown(f"## Score: {score}/100 · {verdict}")
+        feedback_slot.write(state["feedback"])
+        result = state
+    return result
 
 # --- THE LIBRARY VIEW ---
 def view_problem_list(supabase):
@@ -34,8 +34,9 @@ def view_problem_list(supabase):
         st.markdown('<h1 class="glow-header">The Arena</h1>', unsafe_allow_html=True)
         st.caption("Master the behavioral grind. 10 questions at a time.")
     with c2:
-        # Mock Session Progress
-        solved = st.session_state.get('solved_count', 0)
+        # Today's progress from the materialized aggregates (one lookup, no scan)
+        today = get_analytics(supabase).get(current_user_id(), "day", datetime.date.today().isoformat())
+        solved = today.count
         target = 10
         progress = min(solved / target, 1.0)
         
@@ -43,6 +44,7 @@ def view_problem_list(supabase):
         <div class="chart-container">
             <h3 style="margin:0; color:#a78bfa; font-size:14px;">Daily Goal</h3>
             <h1 style="margin:0; font-size: 32px; color:white;">{int(progress*100)}%</h1>
+            <div style="color:#94a3b8; font-size:12px;">{solved}/{target} today · avg {today.mean:.0f} · p90 {today.percentile(90)}</div>
             <div style="background:#334155; height:6px; border-radius:3px; margin-top:5px;">
                 <div style="background:#a78bfa; width:{int(progress*100)}%; height:100%; border-radius:3px;"></div>
             </div>
@@ -51,15 +53,36 @@ def view_problem_list(supabase):
 
     st.markdown("---")
 
-    # 2. FETCH DATA (Get everything so we can filter)
+    # 2. FETCH DATA
     # We fetch ID, Question, Company, Role, Difficulty, Category to display
-    response = supabase.table("questions").select("*").order("created_at", desc=True).limit(200).execute()
-    df = pd.DataFrame(response.data)
+    # (ideal_answer is only loaded for the question being solved).
+    # One immutable Catalog is shared by every session and refreshed in the
+    # background; sessions only hold index views into it.
+    prefetcher = get_prefetcher(supabase)
+    catalog = get_catalog(supabase)
 
-    if df.empty:
+    if catalog.empty:
         st.info("The Arena is empty. Go generate some questions!")
         return
 
+    # 2b. RECOMMENDED NEXT (weighted toward your weak categories)
+    index = get_question_index(supabase)
+    picks = index.recommend(fetch_score_history(supabase, current_user_id()), k=3)
+    if picks:
+        st.markdown("### 🧭 Recommended Next")
+        for qid, _ in picks:
+            c1, c2 = st.columns([5, 1], vertical_alignment="center")
+            with c1:
+                st.markdown(f"""
+                <div class="problem-row">
+                    <div class="question-title">{index.question(qid)}</div>
+                    <span class="badge-base badge-blue">{index.category(qid)}</span>
+                </div>
+                """, unsafe_allow_html=True)
+            with c2:
+                if st.button("Start", key=f"btn_rec_{qid}") and open_question(supabase, qid):
+                    st.rerun()
+
     # 3. FILTERS (Word Cloud Style & Dropdown)
     st.markdown("### 🎯 Filter Your Grind")
     
@@ -75,16 +98,15 @@ def view_problem_list(supabase):
         )
         
     with col_drop:
-        companies = ["All"] + sorted(list(df['company'].dropna().unique()))
+        companies = ["All"] + catalog.options("company")
         company_filter = st.selectbox("Target Company", companies, label_visibility="collapsed")
 
-    # Apply Filters
-    if company_filter != "All": df = df[df['company'] == company_filter]
-    if diff_filter != "All": df = df[df['difficulty'] == diff_filter]
+    # Apply Filters (cached on the catalog, shared by sessions with the same filters)
+    positions = catalog.view(company=company_filter, difficulty=diff_filter)
 
     # 4. PAGINATION LOGIC (10 Per Page)
     ITEMS_PER_PAGE = 10
-    total_items = len(df)
+    total_items = len(positions)
     total_pages = math.ceil(total_items / ITEMS_PER_PAGE)
     
     if "page_number" not in st.session_state: st.session_state.page_number = 0
@@ -94,13 +116,17 @@ def view_problem_list(supabase):
     
     start_idx = st.session_state.page_number * ITEMS_PER_PAGE
     end_idx = start_idx + ITEMS_PER_PAGE
-    df_page = df.iloc[start_idx:end_idx]
+    page_positions = positions[start_idx:end_idx]
+
+    # Warm full rows for this page, the next one and the recommendations
+    prefetcher.warm([qid for qid, _ in picks] + catalog.ids[positions[start_idx:end_idx + ITEMS_PER_PAGE]].tolist())
 
     # Display count
     st.caption(f"Showing {start_idx + 1}-{min(end_idx, total_items)} of {total_items} questions")
 
     # 5. RENDER CARDS
-    for index, row in df_page.iterrows():
+    for pos in page_positions:
+        row = catalog.row(pos)
         diff = row.get('difficulty', 'Medium') or 'Medium'
         role = row.get('role', 'General') or 'General'
         comp = row.get('company', 'Unknown') or 'Unknown'
@@ -126,18 +152,9 @@ def view_problem_list(supabase):
                 # THE FIX: We use a distinct key for every button
                 if st.button("Start", key=f"btn_start_{row['id']}"):
                     # CRITICAL FIX: Fetch full data from DB to ensure 'ideal_answer' exists
-                    # We handle both real IDs (int) and temp IDs (str)
-                    q_id = row['id']
-                    
-                    if isinstance(q_id, int):
-                        # Real DB Question -> Fetch fresh
-                        data = supabase.table("questions").select("*").eq("id", q_id).single().execute()
-                        st.session_state.selected_question = data.data
-                    else:
-                        # Temp/AI Question -> Use row data (already has ideal_answer)
-                        st.session_state.selected_question = row.to_dict()
-                        
-                    st.rerun()
+                    # (usually already prefetched; the session keeps a reference to the shared, read-only row)
+                    if open_question(supabase, row['id']):
+                        st.rerun()
 
     # 6. PAGINATION CONTROLS
     st.markdown("<br>", unsafe_allow_html=True)
@@ -166,6 +183,14 @@ def view_solve_page(supabase, groq_client):
             st.rerun()
         return
 
+    # While the user reads and records: warm Groq and the likely next questions
+    prefetcher = get_prefetcher(supabase)
+    prefetcher.warm_connection(groq_client)
+    index = get_question_index(supabase)
+    next_ids = [qid for qid, _ in index.similar(q.get('id'), k=3)]
+    next_ids += [qid for qid, _ in index.recommend(fetch_score_history(supabase, current_user_id()), k=3)]
+    prefetcher.warm(next_ids)
+
     # Header
     col_back, col_title = st.columns([1, 5])
     with col_back:
@@ -190,29 +215,31 @@ def view_solve_page(supabase, groq_client):
             
     with c2:
         st.write("🎙️ **Record Your Answer**")
-        audio = mic_recorder(start_prompt="🔴 Record", stop_prompt="⏹️ Stop", key='recorder')
+        audio = mic_recorder(start_prompt="🔴 Record", stop_prompt="⏹️ Stop", format="wav", key='recorder')
         
         if audio:
             st.audio(audio['bytes'])
             if st.button("Submit Answer", type="primary"):
                 with st.spinner("Analyzing..."):
                     try:
-                        # 1. Update session progress
-                        if 'solved_count' not in st.session_state: st.session_state.solved_count = 0
-                        st.session_state.solved_count += 1
+                        # 1. Transcribe
+                        # Chunks are transcribed in parallel; show the transcript as it fills in
+                        transcript_slot = st.empty()
+                        for done, total, transcript in transcribe_stream(audio['bytes'], groq_client):
+                            transcript_slot.caption(f"Transcribing ({done}/{total}): {transcript}")
+                        transcript_slot.empty()
                         
-                        # 2. Transcribe
-                        with open("temp.wav", "wb") as f: f.write(audio['bytes'])
-                        with open("temp.wav", "rb") as f:
-                            transcript = groq_client.audio.transcriptions.create(file=("temp.wav", f.read()), model="whisper-large-v3").text
-                        
-                        # 3. Grade
-                        raw_feedback = get_ai_feedback(transcript, q['ideal_answer'], q['question'], groq_client)
-                        score, verdict, feedback = parse_feedback(raw_feedback)
+                        # 2. Grade
+                        result = get_ai_feedback(transcript, q['ideal_answer'], q['question'], groq_client)
                         
                         st.success("Analysis Complete!")
-                        st.markdown(f"## Score: {score}/100")
-                        st.write(raw_feedback)
                         
                     except Exception as e:
-                        st.error(f"Error: {e}")
\ No newline at end of file
+                        st.error(f"Error: {e}")
+                        return
+
+                # 3. Update progress aggregates (best effort; the grade is already on screen)
+                try:
+                    get_analytics(supabase).record({"ai_score": result['score'], "ai_verdict": result['verdict']}, q, current_user_id())
+                except Exception:
+                    logger.exception("Analytics update failed for question %s", q.get('id'))
\ No newline at end of file
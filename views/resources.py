@@ -0,0 +1,89 @@
+import streamlit as st
+from core.recommend import QuestionIndex
+from core.prefetch import Prefetcher
+from core.tagger import load_tagger
+from core.analytics import SubmissionAnalytics, ANONYMOUS, session_user_id, is_session_user
+from core.catalog import Catalog
+from core.dataset import LISTING_COLUMNS
+
+# Process-wide resources shared by app.py and every view. Keep them here
+# so each one is defined (and cached) exactly once.
+
+CATALOG_LIMIT = 500      # Newest questions listed in the Arena
+CATALOG_TTL = 5          # Seconds before the listing is refreshed in the background
+HISTORY_LIMIT = 500      # Recent submissions used to weight recommendations
+
+@st.cache_resource
+def get_question_index(_supabase):
+    """One recommendation index for the whole process, shared by every session."""
+    index = QuestionIndex()
+    page_size, start = 1000, 0
+    while True:
+        rows = (_supabase.table("questions").select("id, question, category").order("id")
+                .range(start, start + page_size - 1).execute().data)
+        index.add(rows)
+        if len(rows) < page_size:
+            return index
+        start += page_size
+
+@st.cache_resource
+def get_tagger():
+    # Trained on the seeded bank at startup (well under a second, no API calls)
+    return load_tagger()
+
+@st.cache_resource
+def get_prefetcher(_supabase):
+    return Prefetcher(_supabase)
+
+@st.cache_resource
+def get_analytics(_supabase):
+    return SubmissionAnalytics(_supabase)
+
+def open_question(_supabase, question_id):
+    """
+    Selects a question to solve. If it was deleted since it was listed,
+    drops it from the recommendation index, warns and returns None.
+    """
+    row = get_prefetcher(_supabase).get(question_id)
+    if row is None:
+        get_question_index(_supabase).discard([question_id])
+        st.warning("That question has been removed. Please pick another one.")
+        return None
+    st.session_state.selected_question = row
+    return row
+
+def current_user_id():
+    """
+    Whose progress to show: the signed-in user, or else this browser
+    session, so signed-out visitors don't share one pooled Daily Goal.
+    """
+    if st.session_state.get("user_id"):
+        return st.session_state.user_id
+    if "session_user_id" not in st.session_state:
+        st.session_state.session_user_id = session_user_id()
+    return st.session_state.session_user_id
+
+def submission_user_id():
+    """Owner written on the submissions row (signed-out answers are pooled as anonymous)."""
+    return st.session_state.get("user_id") or ANONYMOUS
+
+def get_catalog(_supabase):
+    """
+    One immutable Catalog shared by every session, served from the last
+    snapshot and refreshed in the background; sessions only hold views into it.
+    """
+    index = get_question_index(_supabase)
+    def fetch_catalog():
+        rows = _supabase.table("questions").select(", ".join(LISTING_COLUMNS)).order("created_at", desc=True).limit(CATALOG_LIMIT).execute().data
+        index.add(rows)  # Picks up newly generated questions
+        return Catalog(rows)
+    return get_prefetcher(_supabase).snapshot("catalog", fetch_catalog, ttl=CATALOG_TTL)
+
+@st.cache_data(ttl=30)
+def fetch_score_history(_supabase, user_id):
+    """The user's recent (question_id, ai_score) pairs, for recommendation weighting."""
+    if is_session_user(user_id):
+        return []  # Signed-out sessions have no stored history of their own
+    response = (_supabase.table("submissions").select("question_id, ai_score").eq("user_id", user_id)
+                .order("created_at", desc=True).limit(HISTORY_LIMIT).execute())
+    return response.data